@@ -3,10 +3,28 @@ Flask Application Factory
 Creates and configures the Flask application instance.
 """
 import os
-from flask import Flask, jsonify
+import time
 
-from app.extensions import db, cors, migrate
-from app.config import config
+import click
+from flask import Flask, current_app, g, jsonify
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from app.extensions import db, cors, PRIMARY_COOKIE
+from app.services import (
+    notifier,
+    ingest,
+    page_cache,
+    assets,
+    images,
+    site_stylesheet,
+    ticket_search,
+    request_profiler,
+    rate_limiter,
+    idempotency
+)
+from app.config import config, SQLITE_PROFILES, SQLITE_WRITE_PRAGMAS
+from app.utils import json_provider_class
 
 
 def create_app(config_name=None):
@@ -15,7 +33,7 @@ def create_app(config_name=None):
     
     Args:
         config_name: Configuration to use ('development', 'production', 'testing')
-        
+    
     Returns:
         Configured Flask application instance
     """
@@ -34,28 +52,154 @@ def create_app(config_name=None):
     # Register error handlers
     _register_error_handlers(app)
     
-    # Create database tables
-    with app.app_context():
-        db.create_all()
+    # Register CLI commands
+    _register_commands(app)
+    
+    # Create database tables (skipped when the schema is managed out of band)
+    if app.config['AUTO_CREATE_TABLES']:
+        with app.app_context():
+            db.create_all()
     
     return app
 
 
 def _init_extensions(app):
     """Initialize Flask extensions with the app instance."""
+    # Before the profiler, which wraps whichever provider is installed
+    app.json = json_provider_class(app.config['JSON_PROVIDER'])(app)
+    _configure_read_replica(app)
+    _configure_pool(app)
     db.init_app(app)
-    migrate.init_app(app, db)
+    _configure_sqlite(app)
+    _init_migrations(app)
+    notifier.init_app(app)
+    ingest.init_app(app)
+    page_cache.init_app(app)
+    assets.init_app(app)
+    images.init_app(app)
+    site_stylesheet.init_app(app)
+    ticket_search.init_app(app)
+    request_profiler.init_app(app)
+    rate_limiter.init_app(app)
+    idempotency.init_app(app)
     
     # Configure CORS with allowed origins
     cors.init_app(
         app,
         origins=app.config.get('CORS_ORIGINS', ['*']),
         supports_credentials=True,
-        allow_headers=['Content-Type', 'Authorization'],
+        allow_headers=['Content-Type', 'Authorization', 'Idempotency-Key'],
+        expose_headers=['Retry-After', 'Idempotent-Replayed'],
         methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS']
     )
 
 
+def _init_migrations(app):
+    """
+    Set up Flask-Migrate when the app is loaded by the flask CLI.
+    
+    Alembic is the largest import in the app and web workers never run
+    migrations, so servers skip it. The flask command builds the app inside
+    a click context, which is how CLI loads are told apart.
+    """
+    if click.get_current_context(silent=True) is None:
+        return
+    
+    from flask_migrate import Migrate
+    Migrate(app, db)
+
+
+def _configure_read_replica(app):
+    """Register DATABASE_READ_URL as the 'replica' bind."""
+    read_url = app.config.get('DATABASE_READ_URL')
+    
+    if not read_url:
+        return
+    
+    if read_url == 'sqlite-ro':
+        # Read-only connection to the primary SQLite file
+        url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+        read_url = url.set(
+            database=f'file:{url.database}',
+            query={'mode': 'ro', 'uri': 'true'}
+        )
+    
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    binds['replica'] = read_url
+    app.config['SQLALCHEMY_BINDS'] = binds
+    
+    app.after_request(_stick_to_primary)
+
+
+def _stick_to_primary(response):
+    """After a write, keep this client's reads on the primary for a few seconds."""
+    seconds = current_app.config['READ_REPLICA_STICKY_SECONDS']
+    
+    if g.get('db_wrote') and seconds:
+        response.set_cookie(
+            PRIMARY_COOKIE,
+            str(int(time.time()) + seconds),
+            max_age=seconds,
+            secure=current_app.config.get('SESSION_COOKIE_SECURE', False),
+            httponly=True,
+            samesite='Lax'
+        )
+    return response
+
+
+def _configure_pool(app):
+    """Add DB_POOL_OPTIONS to the engine options unless the database lives in memory."""
+    pool_options = app.config.get('DB_POOL_OPTIONS')
+    url = app.config.get('SQLALCHEMY_DATABASE_URI')
+    
+    if not pool_options or not url or not _uses_queue_pool(make_url(url)):
+        return
+    
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        **pool_options,
+        **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    }
+
+
+def _uses_queue_pool(url):
+    """Whether SQLAlchemy gives this URL a QueuePool (in-memory SQLite gets a single-connection pool)."""
+    if url.get_backend_name() != 'sqlite':
+        return True
+    return bool(url.database) and url.database != ':memory:' and url.query.get('mode') != 'memory'
+
+
+def _configure_sqlite(app):
+    """Apply the configured SQLite PRAGMA profile to every new connection."""
+    pragmas = SQLITE_PROFILES[app.config['SQLITE_PROFILE']]
+    
+    if not pragmas:
+        return
+    
+    with app.app_context():
+        engines = dict(db.engines)
+    
+    for bind_key, engine in engines.items():
+        if engine.dialect.name != 'sqlite':
+            continue
+        
+        if bind_key == 'replica':
+            _listen_for_pragmas(engine, {
+                name: value for name, value in pragmas.items()
+                if name not in SQLITE_WRITE_PRAGMAS
+            })
+        else:
+            _listen_for_pragmas(engine, pragmas)
+
+
+def _listen_for_pragmas(engine, pragmas):
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+
 def _register_blueprints(app):
     """Register all application blueprints."""
     # API blueprints
@@ -93,6 +237,184 @@ def _register_blueprints(app):
         })
 
 
+def _register_commands(app):
+    """Register custom Flask CLI commands."""
+    
+    @app.cli.command('init-db')
+    def init_db():
+        """Create any missing database tables and indexes."""
+        from app.services import (
+            add_summary_columns, build_search_index, enable_ticket_autoincrement, find_stale_summaries
+        )
+        
+        db.create_all()
+        
+        # Tickets created before the summary columns existed get them filled in
+        added = add_summary_columns()
+        if added:
+            stale = find_stale_summaries(fix=True)
+            print(f'Added columns: {", ".join(added)}; updated {len(stale)} ticket summaries.')
+        
+        if enable_ticket_autoincrement():
+            print('Rebuilt tickets with AUTOINCREMENT ids.')
+        build_search_index()
+        print('Database tables are up to date.')
+    
+    @app.cli.command('search-index')
+    @click.option('--rebuild', is_flag=True, help='Re-index all tickets and messages.')
+    def search_index_command(rebuild):
+        """Create (or rebuild) the full-text search index."""
+        from app.services import build_search_index
+        
+        if build_search_index(rebuild=rebuild):
+            print('Search index built.')
+        else:
+            print('Search index already present (or not SQLite); nothing to do.')
+    
+    @app.cli.command('backfill-summaries')
+    @click.option('--chunk-size', default=1000, show_default=True, help='Tickets per transaction.')
+    def backfill_summaries_command(chunk_size):
+        """Add the ticket conversation summary columns and fill them in."""
+        from app.services import add_summary_columns, find_stale_summaries
+        
+        added = add_summary_columns()
+        if added:
+            print(f'Added columns: {", ".join(added)}')
+        
+        stale = find_stale_summaries(chunk_size, fix=True)
+        print(f'Updated {len(stale)} ticket summaries.')
+    
+    @app.cli.command('check-summaries')
+    @click.option('--chunk-size', default=1000, show_default=True, help='Tickets per query.')
+    def check_summaries_command(chunk_size):
+        """Report tickets whose conversation summary disagrees with their messages."""
+        from app.services import find_stale_summaries
+        
+        stale = find_stale_summaries(chunk_size)
+        for ticket_id, fields in stale[:50]:
+            print(f'{ticket_id}: {", ".join(fields)}')
+        
+        if stale:
+            raise click.ClickException(
+                f'{len(stale)} stale ticket summaries; run `flask backfill-summaries`.'
+            )
+        print('All ticket summaries are consistent.')
+    
+    @app.cli.command('import-subscribers')
+    @click.argument('path', type=click.File('rb'))
+    def import_subscribers_command(path):
+        """Bulk-subscribe emails from a CSV or JSON file."""
+        from app.services import read_emails, import_subscribers, invalidate_dashboard_stats
+        
+        try:
+            emails = read_emails(path.read())
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        
+        counts = import_subscribers(emails, app.config['SUBSCRIBER_IMPORT_CHUNK_SIZE'])
+        invalidate_dashboard_stats()
+        
+        print(', '.join(f'{count} {name}' for name, count in counts.items()))
+    
+    @app.cli.command('build-css')
+    def build_css_command():
+        """Compile the purged Tailwind stylesheet and font subsets."""
+        from app.services import build_css
+        
+        try:
+            size, font_count = build_css(app.static_folder, app.config['TAILWIND_BIN'])
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
+        
+        print(f'Wrote css/site.css ({size / 1024:.1f} KiB) and {font_count} font subsets')
+    
+    @app.cli.command('fetch-fonts')
+    def fetch_fonts_command():
+        """Download the font sources that build-css subsets."""
+        from app.services import fetch_fonts
+        
+        try:
+            written = fetch_fonts()
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
+        
+        print(f'Downloaded {", ".join(written)}' if written else 'Font sources already present')
+    
+    @app.cli.command('fetch-tailwind')
+    @click.argument('path', type=click.Path(dir_okay=False))
+    def fetch_tailwind_command(path):
+        """Install the pinned Tailwind standalone CLI at PATH."""
+        from app.services import fetch_tailwind
+        
+        try:
+            fetch_tailwind(path)
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
+        
+        print(f'Installed Tailwind CLI at {path}')
+    
+    @app.cli.command('pin-downloads')
+    def pin_downloads_command():
+        """Record the URL and sha256 of every build download in downloads.lock.json."""
+        from app.services import pin_downloads
+        
+        try:
+            lock = pin_downloads()
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
+        
+        for pin in lock.values():
+            print(f'{pin["sha256"]}  {pin["url"]}')
+    
+    @app.cli.command('build-images')
+    def build_images_command():
+        """Write resized AVIF/WebP derivatives of the static images."""
+        from app.services import build_images
+        
+        try:
+            manifest = build_images(app.static_folder)
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
+        
+        print(f'Built derivatives for {len(manifest)} images; run build-assets next')
+    
+    @app.cli.command('build-assets')
+    def build_assets_command():
+        """Write hashed, minified and precompressed static files."""
+        from app.services import build_assets
+        
+        try:
+            manifest = build_assets(app.static_folder)
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
+        
+        print(f'Built {len(manifest)} assets into {app.static_folder}/dist')
+    
+    @app.cli.command('profile-imports')
+    @click.option('--config', 'config_name', default='production', help='Configuration to profile.')
+    @click.option('--limit', default=25, help='Number of rows to show.')
+    @click.option('--by-package', is_flag=True, help='Sum self time per top-level package.')
+    def profile_imports_command(config_name, limit, by_package):
+        """Report per-module import cost of create_app (like -X importtime)."""
+        from app.utils.importtime import profile_imports, package_totals
+        
+        records = profile_imports(config_name)
+        total_us = sum(record.self_us for record in records)
+        
+        if by_package:
+            print(f'{"self ms":>9}  {"modules":>7}  package')
+            for name, self_us, count in package_totals(records)[:limit]:
+                print(f'{self_us / 1000:>9.1f}  {count:>7}  {name}')
+        else:
+            print(f'{"self ms":>9}  {"cumul ms":>9}  module')
+            ranked = sorted(records, key=lambda record: record.cumulative_us, reverse=True)
+            for record in ranked[:limit]:
+                print(f'{record.self_us / 1000:>9.1f}  {record.cumulative_us / 1000:>9.1f}  '
+                      f'{"  " * record.depth}{record.module}')
+        
+        print(f'{len(records)} modules imported in {total_us / 1000:.1f} ms')
+
+
 def _register_error_handlers(app):
     """Register custom error handlers."""
     
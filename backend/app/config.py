@@ -3,10 +3,44 @@ Configuration Classes for Flask Application
 Supports development, testing, and production environments.
 """
 import os
-from dotenv import load_dotenv
+import tempfile
 
-# Load environment variables from .env file
-load_dotenv()
+
+def _load_env_file():
+    """
+    Load backend/.env into the environment if the file exists.
+    
+    Deployed containers get real environment variables and no .env file,
+    so python-dotenv is only imported when there is something to load.
+    """
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env')
+    
+    if os.path.isfile(path):
+        from dotenv import load_dotenv
+        load_dotenv(path)
+
+
+_load_env_file()
+
+# SQLite PRAGMA profiles, applied to every new connection (ignored for MySQL)
+SQLITE_PROFILES = {
+    'default': {},
+    'production': {
+        # WAL lets portal/admin readers run while a form submission writes
+        'journal_mode': 'WAL',
+        # With WAL, fsync at checkpoints only; committed data survives app crashes
+        'synchronous': 'NORMAL',
+        # Wait for the write lock instead of failing with "database is locked"
+        'busy_timeout': 5000,
+        'mmap_size': 256 * 1024 * 1024,
+        # Negative means KiB: 16 MiB page cache per connection
+        'cache_size': -16 * 1024,
+        'temp_store': 'MEMORY',
+    },
+}
+
+# PRAGMAs that need write access, skipped on read-only connections
+SQLITE_WRITE_PRAGMAS = {'journal_mode', 'synchronous'}
 
 
 class Config:
@@ -14,11 +48,110 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret-key-change-me')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Optional read engine for read-only endpoints: a database URL (e.g. a
+    # MySQL replica), or 'sqlite-ro' for a read-only connection to the same file
+    DATABASE_READ_URL = os.environ.get('DATABASE_READ_URL')
+    # Seconds a client that wrote keeps reading from the primary (cookie), so
+    # the redirect or GET after a POST never sees a lagging replica
+    READ_REPLICA_STICKY_SECONDS = int(os.environ.get('READ_REPLICA_STICKY_SECONDS', 5))
+    
+    # Key into SQLITE_PROFILES
+    SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'default')
+    
+    # QueuePool settings for file-backed and server databases (see ProductionConfig)
+    DB_POOL_OPTIONS = {}
+    
+    # Run db.create_all() in create_app. When off, the factory does no DB I/O
+    # and the schema is managed with `flask init-db` / `flask db upgrade`
+    AUTO_CREATE_TABLES = os.environ.get('AUTO_CREATE_TABLES', 'true').lower() in ('1', 'true', 'yes')
+    
+    # Key for the ticket ID permutation; changing it only affects new tickets
+    TICKET_ID_KEY = os.environ.get('TICKET_ID_KEY', SECRET_KEY)
+    
     # CORS settings
     CORS_ORIGINS = os.environ.get(
         'CORS_ORIGINS', 
         'https://opticode.pythonanywhere.com,http://localhost:5500'
     ).split(',')
+    
+    # Long-poll settings for the status portal
+    TICKET_LONGPOLL_TIMEOUT = int(os.environ.get('TICKET_LONGPOLL_TIMEOUT', 25))
+    # Parked long-polls per worker; each holds a gunicorn thread (of --threads 16)
+    TICKET_LONGPOLL_MAX_WAITERS = int(os.environ.get('TICKET_LONGPOLL_MAX_WAITERS', 8))
+    NOTIFY_SOCKET_DIR = os.environ.get(
+        'NOTIFY_SOCKET_DIR',
+        os.path.join(tempfile.gettempdir(), 'opticode-notify')
+    )
+    
+    # Form ingestion: 'sync' writes on the request thread, 'batched' group-commits
+    # through a per-worker writer with a local journal (keep it on a persistent disk)
+    INGEST_MODE = os.environ.get('INGEST_MODE', 'sync')
+    INGEST_JOURNAL_DIR = os.environ.get(
+        'INGEST_JOURNAL_DIR',
+        os.path.join(tempfile.gettempdir(), 'opticode-ingest')
+    )
+    INGEST_BATCH_SIZE = int(os.environ.get('INGEST_BATCH_SIZE', 100))
+    INGEST_BATCH_WAIT_MS = int(os.environ.get('INGEST_BATCH_WAIT_MS', 5))
+    INGEST_COMMIT_TIMEOUT = float(os.environ.get('INGEST_COMMIT_TIMEOUT', 5))
+    
+    # Seconds the admin dashboard counts may be served from cache
+    DASHBOARD_STATS_TTL = int(os.environ.get('DASHBOARD_STATS_TTL', 30))
+    
+    # Static marketing pages are rendered once per worker and served from memory
+    PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    PAGE_CACHE_MAX_AGE = int(os.environ.get('PAGE_CACHE_MAX_AGE', 300))
+    
+    # Rows fetched per round trip by admin CSV/NDJSON exports
+    EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 1000))
+    
+    # Emails per transaction in bulk subscriber imports
+    SUBSCRIBER_IMPORT_CHUNK_SIZE = int(os.environ.get('SUBSCRIBER_IMPORT_CHUNK_SIZE', 500))
+    
+    # Newest full-text matches per index (tickets, messages) ranked by search
+    SEARCH_CANDIDATES = int(os.environ.get('SEARCH_CANDIDATES', 1000))
+    
+    # Fraction of requests profiled (Server-Timing header, SQL counts, N+1
+    # warnings); 0 installs no hooks. A few percent is cheap in production.
+    PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+    PROFILE_N_PLUS_ONE_THRESHOLD = int(os.environ.get('PROFILE_N_PLUS_ONE_THRESHOLD', 5))
+    PROFILE_SLOW_REQUEST_MS = int(os.environ.get('PROFILE_SLOW_REQUEST_MS', 500))
+    
+    # Token-bucket limits on public POSTs, 'requests/seconds' per client IP
+    # (per ticket for TICKET_MESSAGE). 'memory' counts per worker; 'sqlite'
+    # shares buckets between workers through a local file
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+    RATE_LIMIT_DB = os.environ.get(
+        'RATE_LIMIT_DB',
+        os.path.join(tempfile.gettempdir(), 'opticode-ratelimit', 'buckets.db')
+    )
+    RATE_LIMIT_QUOTE = os.environ.get('RATE_LIMIT_QUOTE', '5/600')
+    RATE_LIMIT_SUBSCRIBE = os.environ.get('RATE_LIMIT_SUBSCRIBE', '10/600')
+    RATE_LIMIT_LEAD = os.environ.get('RATE_LIMIT_LEAD', '10/600')
+    RATE_LIMIT_MESSAGE = os.environ.get('RATE_LIMIT_MESSAGE', '30/300')
+    RATE_LIMIT_TICKET_MESSAGE = os.environ.get('RATE_LIMIT_TICKET_MESSAGE', '20/300')
+    # Reverse proxies in front of the app that append to X-Forwarded-For
+    RATE_LIMIT_TRUSTED_PROXIES = int(os.environ.get('RATE_LIMIT_TRUSTED_PROXIES', 0))
+    
+    # Idempotency-Key replays for quote, lead and ticket message POSTs. 'sqlite'
+    # shares keys between workers through a local file; 'memory' is per worker
+    IDEMPOTENCY_BACKEND = os.environ.get('IDEMPOTENCY_BACKEND', 'sqlite')
+    IDEMPOTENCY_DB = os.environ.get(
+        'IDEMPOTENCY_DB',
+        os.path.join(tempfile.gettempdir(), 'opticode-idempotency', 'keys.db')
+    )
+    IDEMPOTENCY_TTL = int(os.environ.get('IDEMPOTENCY_TTL', 86400))
+    
+    # JSON encoder for responses: 'auto' uses orjson when installed, else 'stdlib'
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'auto')
+    
+    # Serve url_for('static', ...) from the hashed `flask build-assets` output
+    ASSET_MANIFEST = True
+    
+    # Link the compiled css/site.css (from `flask build-css`) instead of the
+    # Tailwind CDN, once it has been built
+    COMPILED_CSS = True
+    TAILWIND_BIN = os.environ.get('TAILWIND_BIN', 'tailwindcss')
 
 
 class DevelopmentConfig(Config):
@@ -28,12 +161,41 @@ class DevelopmentConfig(Config):
         'DATABASE_URL', 
         'sqlite:///opticode_dev.db'
     )
+    
+    # Edits to static files and template classes show up without rebuilding
+    ASSET_MANIFEST = False
+    COMPILED_CSS = False
+    
+    # Profile every request
+    PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 1))
 
 
 class ProductionConfig(Config):
     """Production configuration with security hardening."""
     DEBUG = False
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
+    SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'production')
+    
+    # Keep the ingest journal on the persistent disk (render.yaml mounts /data)
+    # so submissions journaled before a redeploy are replayed after it
+    INGEST_JOURNAL_DIR = os.environ.get('INGEST_JOURNAL_DIR', '/data/ingest-journal')
+    
+    # Workers boot without touching the database; the container runs init-db once
+    AUTO_CREATE_TABLES = os.environ.get('AUTO_CREATE_TABLES', 'false').lower() in ('1', 'true', 'yes')
+    
+    # One pooled connection per gunicorn thread, recycled before MySQL's idle
+    # timeout. create_app adds these to the engine options only for pooled
+    # URLs; in-memory SQLite uses a single-connection pool that rejects them
+    DB_POOL_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 16)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 4)),
+        'pool_timeout': 10,
+        'pool_recycle': 1800,
+    }
+    
+    # Render and PythonAnywhere both put one proxy in front of the app; without
+    # it every client would share the proxy's address and rate limit bucket
+    RATE_LIMIT_TRUSTED_PROXIES = int(os.environ.get('RATE_LIMIT_TRUSTED_PROXIES', 1))
     
     # Security headers
     SESSION_COOKIE_SECURE = True
@@ -45,6 +207,13 @@ class TestingConfig(Config):
     """Testing configuration with in-memory database."""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    
+    # Keep notifications inside the test process
+    NOTIFY_SOCKET_DIR = None
+    
+    # Test clients all share one address
+    RATE_LIMIT_ENABLED = False
+    IDEMPOTENCY_BACKEND = 'memory'
 
 
 # Configuration dictionary for easy access
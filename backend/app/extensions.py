@@ -2,15 +2,65 @@
 Flask Extensions Module
 Centralized extension instances for the application.
 """
+import time
+
+from flask import g, has_app_context, has_request_context, request
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from flask_cors import CORS
-from flask_migrate import Migrate
+from sqlalchemy import event
+
+# Cookie holding the Unix time until which a client that wrote reads from the primary
+PRIMARY_COOKIE = 'read_primary_until'
+
+
+class RoutingSession(Session):
+    """
+    Session that can serve reads from the 'replica' bind.
+    
+    SELECTs go to the replica when the current request opted in with
+    @read_replica and a replica is configured. Once the session has flushed
+    a write it sticks to the primary, so it always reads its own writes.
+    A request that wrote also sets PRIMARY_COOKIE (see create_app), so the
+    same client's next requests, such as the redirect after a POST, read
+    from the primary until a lagging replica has caught up.
+    """
+    
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and clause is not None and clause.is_select and self._use_replica():
+            return self._db.engines['replica']
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+    
+    def _use_replica(self):
+        return (
+            has_app_context()
+            and g.get('read_replica', False)
+            and not self.info.get('wrote', False)
+            and not _recently_wrote()
+            and 'replica' in self._db.engines
+        )
+
+
+def _recently_wrote():
+    """Whether this client's PRIMARY_COOKIE is still in force."""
+    if not has_request_context():
+        return False
+    
+    try:
+        return float(request.cookies.get(PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_session_wrote(session, flush_context):
+    session.info['wrote'] = True
+    if has_app_context():
+        g.db_wrote = True
+
 
 # Database ORM
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 # Cross-Origin Resource Sharing
 cors = CORS()
-
-# Database Migrations
-migrate = Migrate()
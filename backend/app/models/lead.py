@@ -19,6 +19,10 @@ class Lead(db.Model):
         created_at: Timestamp of submission
     """
     __tablename__ = 'leads'
+    __table_args__ = (
+        # Keyset pagination, newest first
+        db.Index('ix_leads_created_at_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -27,6 +31,12 @@ class Lead(db.Model):
     address = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     
+    # Keys of to_dict(), for list endpoints that serialize rows with a Projection
+    DICT_FIELDS = ('id', 'name', 'phone', 'school', 'address', 'created_at')
+    
+    # DICT_FIELDS without the free-text address
+    SUMMARY_FIELDS = ('id', 'name', 'phone', 'school', 'created_at')
+    
     def to_dict(self):
         """Convert lead to dictionary for JSON serialization."""
         return {
@@ -18,9 +18,13 @@ class Message(db.Model):
         created_at: Timestamp of creation
     """
     __tablename__ = 'messages'
+    __table_args__ = (
+        # Conversation reads and cursors walk messages in (ticket_id, id) order
+        db.Index('ix_messages_ticket_id_id', 'ticket_id', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    ticket_id = db.Column(db.Integer, db.ForeignKey('tickets.id'), nullable=False, index=True)
+    ticket_id = db.Column(db.Integer, db.ForeignKey('tickets.id'), nullable=False)
     sender = db.Column(db.String(20), nullable=False)  # 'user' or 'admin'
     message = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -29,6 +33,9 @@ class Message(db.Model):
     SENDER_USER = 'user'
     SENDER_ADMIN = 'admin'
     
+    # Keys of to_dict(), for list endpoints that serialize rows with a Projection
+    DICT_FIELDS = ('id', 'ticket_id', 'sender', 'message', 'created_at')
+    
     def to_dict(self):
         """Convert message to dictionary for JSON serialization."""
         return {
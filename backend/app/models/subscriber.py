@@ -18,6 +18,11 @@ class Subscriber(db.Model):
         unsubscribed_at: Timestamp of unsubscription (if applicable)
     """
     __tablename__ = 'subscribers'
+    __table_args__ = (
+        # Keyset pagination, newest first, with and without an active filter
+        db.Index('ix_subscribers_is_active_subscribed_at_id', 'is_active', 'subscribed_at', 'id'),
+        db.Index('ix_subscribers_subscribed_at_id', 'subscribed_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False, index=True)
@@ -25,6 +30,9 @@ class Subscriber(db.Model):
     subscribed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     unsubscribed_at = db.Column(db.DateTime, nullable=True)
     
+    # Keys of to_dict(), for list endpoints that serialize rows with a Projection
+    DICT_FIELDS = ('id', 'email', 'is_active', 'subscribed_at')
+    
     def to_dict(self):
         """Convert subscriber to dictionary for JSON serialization."""
         return {
@@ -20,8 +20,25 @@ class Ticket(db.Model):
         status: Current ticket status
         created_at: Timestamp of creation
         updated_at: Timestamp of last update
+        message_count: Number of messages in the conversation
+        last_message_id: ID of the newest message
+        last_message_at: When the newest message was sent
+        last_sender: Sender of the newest message ('user' or 'admin')
+        unread_count: User messages since the last admin message
+    
+    The conversation summary fields are maintained by
+    app.services.conversations whenever a message is added.
     """
     __tablename__ = 'tickets'
+    __table_args__ = (
+        # Keyset pagination, newest first, with and without a status filter
+        db.Index('ix_tickets_status_created_at_id', 'status', 'created_at', 'id'),
+        db.Index('ix_tickets_created_at_id', 'created_at', 'id'),
+        # "Awaiting reply" list: last_sender = 'user', most recent activity first
+        db.Index('ix_tickets_last_sender_last_message_at_id', 'last_sender', 'last_message_at', 'id'),
+        # Ticket IDs are derived from the id, so SQLite must never reuse one
+        {'sqlite_autoincrement': True},
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     ticket_id = db.Column(db.String(20), unique=True, nullable=False, index=True)
@@ -33,6 +50,13 @@ class Ticket(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Conversation summary, so list views need no per-ticket message queries
+    message_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    last_message_id = db.Column(db.Integer)
+    last_message_at = db.Column(db.DateTime)
+    last_sender = db.Column(db.String(20))
+    unread_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    
     # Relationship with messages
     messages = db.relationship('Message', backref='ticket', lazy='dynamic', cascade='all, delete-orphan')
     
@@ -45,6 +69,16 @@ class Ticket(db.Model):
     
     VALID_STATUSES = [STATUS_PENDING, STATUS_ACCEPTED, STATUS_RUNNING, STATUS_COMPLETED, STATUS_CANCELLED]
     
+    # Keys of to_dict(), for list endpoints that serialize rows with a Projection
+    DICT_FIELDS = (
+        'id', 'ticket_id', 'name', 'email', 'project_type', 'message', 'status',
+        'created_at', 'updated_at', 'message_count', 'last_message_at', 'last_sender',
+        'unread_count'
+    )
+    
+    # DICT_FIELDS without the initial message, which can be long
+    SUMMARY_FIELDS = tuple(name for name in DICT_FIELDS if name != 'message')
+    
     def to_dict(self):
         """Convert ticket to dictionary for JSON serialization."""
         return {
@@ -56,7 +90,11 @@ class Ticket(db.Model):
             'message': self.message,
             'status': self.status,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'message_count': self.message_count,
+            'last_message_at': self.last_message_at.isoformat() if self.last_message_at else None,
+            'last_sender': self.last_sender,
+            'unread_count': self.unread_count
         }
     
     def __repr__(self):
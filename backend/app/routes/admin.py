@@ -2,72 +2,156 @@
 Admin Dashboard Routes
 Handles all admin panel pages and actions.
 """
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, flash
+from sqlalchemy import select
+from sqlalchemy.orm import load_only
 
 from app.extensions import db
 from app.models import Ticket, Message, Lead, Subscriber
 from app.routes.auth import login_required
+from app.services import (
+    notifier,
+    ticket_channel,
+    get_dashboard_stats,
+    invalidate_dashboard_stats,
+    export_response,
+    filter_date_range,
+    parse_date_range,
+    read_emails,
+    import_subscribers,
+    ticket_search,
+    request_profiler,
+    record_message
+)
+from app.utils import keyset_paginate, json_response, error_response, read_replica, Projection
 
 admin_bp = Blueprint('admin', __name__)
 
+# List pages never render a ticket's initial message; leave it on disk
+TICKET_SUMMARY = load_only(*(getattr(Ticket, name) for name in Ticket.SUMMARY_FIELDS))
+
+# The subscriber list renders only to_dict() fields; rows are column tuples
+SUBSCRIBER_ROWS = Projection(Subscriber, Subscriber.DICT_FIELDS)
+
 
 @admin_bp.route('/')
 @login_required
 def dashboard():
     """Admin dashboard with statistics."""
-    # Get ticket statistics
-    total_tickets = Ticket.query.count()
-    pending_tickets = Ticket.query.filter_by(status='Pending').count()
-    accepted_tickets = Ticket.query.filter_by(status='Accepted').count()
-    running_tickets = Ticket.query.filter_by(status='Running').count()
-    completed_tickets = Ticket.query.filter_by(status='Completed').count()
-    
-    # Get other statistics
-    total_leads = Lead.query.count()
-    total_subscribers = Subscriber.query.filter_by(is_active=True).count()
+    # Cached aggregate counts
+    stats = get_dashboard_stats()
+    by_status = stats['tickets']['by_status']
     
     # Recent tickets
-    recent_tickets = Ticket.query.order_by(Ticket.created_at.desc()).limit(5).all()
+    recent_tickets = Ticket.query.options(TICKET_SUMMARY).order_by(
+        Ticket.created_at.desc(), Ticket.id.desc()
+    ).limit(5).all()
     
     # Recent leads
-    recent_leads = Lead.query.order_by(Lead.created_at.desc()).limit(5).all()
+    recent_leads = Lead.query.order_by(Lead.created_at.desc(), Lead.id.desc()).limit(5).all()
     
     return render_template('dashboard.html',
-        total_tickets=total_tickets,
-        pending_tickets=pending_tickets,
-        accepted_tickets=accepted_tickets,
-        running_tickets=running_tickets,
-        completed_tickets=completed_tickets,
-        total_leads=total_leads,
-        total_subscribers=total_subscribers,
+        total_tickets=stats['tickets']['total'],
+        pending_tickets=by_status[Ticket.STATUS_PENDING],
+        accepted_tickets=by_status[Ticket.STATUS_ACCEPTED],
+        running_tickets=by_status[Ticket.STATUS_RUNNING],
+        completed_tickets=by_status[Ticket.STATUS_COMPLETED],
+        total_leads=stats['leads'],
+        total_subscribers=stats['subscribers'],
         recent_tickets=recent_tickets,
         recent_leads=recent_leads
     )
 
 
+@admin_bp.route('/stats')
+@login_required
+def stats():
+    """Dashboard statistics as JSON."""
+    return json_response(get_dashboard_stats())
+
+
+@admin_bp.route('/stats/requests')
+@login_required
+def request_stats():
+    """Per-endpoint timings of requests sampled by this worker, as JSON."""
+    return json_response(request_profiler.snapshot())
+
+
 @admin_bp.route('/tickets')
 @login_required
+@read_replica
 def tickets():
-    """List all tickets with filtering."""
+    """
+    List all tickets with filtering, or ranked search results for ?q=.
+    
+    ?awaiting=1 narrows the list to tickets whose customer spoke last,
+    most recent activity first, from the conversation summary index.
+    """
     status_filter = request.args.get('status', 'all')
-    page = request.args.get('page', 1, type=int)
+    search_query = request.args.get('q', '').strip()
+    awaiting = request.args.get('awaiting') == '1'
     per_page = 20
     
-    query = Ticket.query
+    if search_query:
+        tickets = ticket_search.search(
+            search_query,
+            status=None if status_filter == 'all' else status_filter,
+            page=request.args.get('page', 1, type=int),
+            per_page=per_page
+        )
+        return render_template('tickets.html',
+            tickets=tickets,
+            status_filter=status_filter,
+            search_query=search_query,
+            awaiting=False
+        )
+    
+    query = Ticket.query.options(TICKET_SUMMARY)
     
     if status_filter != 'all':
         query = query.filter_by(status=status_filter)
     
-    tickets = query.order_by(Ticket.created_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    if awaiting:
+        query = query.filter(Ticket.last_sender == Message.SENDER_USER)
+        tickets = _keyset_page(query, Ticket.last_message_at, Ticket.id, per_page)
+    else:
+        tickets = _keyset_page(query, Ticket.created_at, Ticket.id, per_page)
     
     return render_template('tickets.html',
         tickets=tickets,
-        status_filter=status_filter
+        status_filter=status_filter,
+        search_query='',
+        awaiting=awaiting
     )
 
 
+@admin_bp.route('/tickets/export.<any(csv, ndjson):fmt>')
+@login_required
+@read_replica
+def export_tickets(fmt):
+    """Download tickets, honoring the list's status filter and a date range."""
+    status_filter = request.args.get('status', 'all')
+    
+    try:
+        start, end = parse_date_range(request.args)
+    except ValueError:
+        flash('Invalid date range.', 'error')
+        return redirect(url_for('admin.tickets', status=status_filter))
+    
+    statement = select(
+        Ticket.ticket_id, Ticket.name, Ticket.email, Ticket.project_type,
+        Ticket.status, Ticket.message, Ticket.created_at, Ticket.updated_at
+    )
+    
+    if status_filter != 'all':
+        statement = statement.filter_by(status=status_filter)
+    
+    statement = filter_date_range(statement, Ticket.created_at, start, end)
+    statement = statement.order_by(Ticket.created_at.desc(), Ticket.id.desc())
+    
+    return export_response(statement, fmt, 'tickets')
+
+
 @admin_bp.route('/tickets/<ticket_id>')
 @login_required
 def ticket_detail(ticket_id):
@@ -99,8 +183,12 @@ def ticket_reply(ticket_id):
         message=message_text
     )
     db.session.add(message)
+    db.session.flush()
+    record_message(message)
     db.session.commit()
     
+    notifier.publish(ticket_channel(ticket.id))
+    
     flash('Reply sent successfully.', 'success')
     return redirect(url_for('admin.ticket_detail', ticket_id=ticket_id))
 
@@ -120,44 +208,142 @@ def ticket_status(ticket_id):
     ticket.status = new_status
     db.session.commit()
     
+    notifier.publish(ticket_channel(ticket.id))
+    invalidate_dashboard_stats()
+    
     flash(f'Status updated to {new_status}.', 'success')
     return redirect(url_for('admin.ticket_detail', ticket_id=ticket_id))
 
 
 @admin_bp.route('/leads')
 @login_required
+@read_replica
 def leads():
     """List all leads."""
-    page = request.args.get('page', 1, type=int)
     per_page = 20
     
-    leads = Lead.query.order_by(Lead.created_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    leads = _keyset_page(Lead.query, Lead.created_at, Lead.id, per_page)
     
     return render_template('leads.html', leads=leads)
 
 
+@admin_bp.route('/leads/export.<any(csv, ndjson):fmt>')
+@login_required
+@read_replica
+def export_leads(fmt):
+    """Download leads within an optional date range."""
+    try:
+        start, end = parse_date_range(request.args)
+    except ValueError:
+        flash('Invalid date range.', 'error')
+        return redirect(url_for('admin.leads'))
+    
+    statement = select(
+        Lead.id, Lead.name, Lead.phone, Lead.school, Lead.address, Lead.created_at
+    )
+    statement = filter_date_range(statement, Lead.created_at, start, end)
+    statement = statement.order_by(Lead.created_at.desc(), Lead.id.desc())
+    
+    return export_response(statement, fmt, 'leads')
+
+
 @admin_bp.route('/subscribers')
 @login_required
+@read_replica
 def subscribers():
     """List all subscribers."""
-    page = request.args.get('page', 1, type=int)
     per_page = 20
     status_filter = request.args.get('status', 'all')
     
-    query = Subscriber.query
+    query = SUBSCRIBER_ROWS.query()
     
     if status_filter == 'active':
         query = query.filter_by(is_active=True)
     elif status_filter == 'inactive':
         query = query.filter_by(is_active=False)
     
-    subscribers = query.order_by(Subscriber.subscribed_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    subscribers = _keyset_page(query, Subscriber.subscribed_at, Subscriber.id, per_page)
     
     return render_template('subscribers.html',
         subscribers=subscribers,
         status_filter=status_filter
     )
+
+
+@admin_bp.route('/subscribers/export.<any(csv, ndjson):fmt>')
+@login_required
+@read_replica
+def export_subscribers(fmt):
+    """Download subscribers, honoring the list's status filter and a date range."""
+    status_filter = request.args.get('status', 'all')
+    
+    try:
+        start, end = parse_date_range(request.args)
+    except ValueError:
+        flash('Invalid date range.', 'error')
+        return redirect(url_for('admin.subscribers', status=status_filter))
+    
+    statement = select(
+        Subscriber.email, Subscriber.is_active, Subscriber.subscribed_at, Subscriber.unsubscribed_at
+    )
+    
+    if status_filter == 'active':
+        statement = statement.filter_by(is_active=True)
+    elif status_filter == 'inactive':
+        statement = statement.filter_by(is_active=False)
+    
+    statement = filter_date_range(statement, Subscriber.subscribed_at, start, end)
+    statement = statement.order_by(Subscriber.subscribed_at.desc(), Subscriber.id.desc())
+    
+    return export_response(statement, fmt, 'subscribers')
+
+
+@admin_bp.route('/subscribers/import', methods=['POST'])
+@login_required
+def import_subscribers_upload():
+    """
+    Bulk-subscribe emails from a CSV or JSON array.
+    
+    Accepts a 'file' form upload (redirects back with a summary) or the
+    file as the raw request body (returns the counts as JSON).
+    """
+    upload = request.files.get('file')
+    data = upload.read() if upload else request.get_data()
+    
+    try:
+        counts = import_subscribers(
+            read_emails(data),
+            current_app.config['SUBSCRIBER_IMPORT_CHUNK_SIZE']
+        )
+    except ValueError as e:
+        if upload is None:
+            return error_response(str(e))
+        flash(f'Import failed: {e}', 'error')
+        return redirect(url_for('admin.subscribers'))
+    
+    invalidate_dashboard_stats()
+    
+    if upload is None:
+        return json_response(counts)
+    
+    flash(
+        f"Imported {counts['new']} new and reactivated {counts['reactivated']} subscribers "
+        f"({counts['existing']} already active, {counts['duplicate']} duplicates, "
+        f"{counts['invalid']} invalid).",
+        'success'
+    )
+    return redirect(url_for('admin.subscribers'))
+
+
+def _keyset_page(query, sort_column, id_column, per_page):
+    """Paginate a list view using the after/before cursors in the query string."""
+    try:
+        return keyset_paginate(
+            query, sort_column, id_column,
+            after=request.args.get('after'),
+            before=request.args.get('before'),
+            per_page=per_page
+        )
+    except ValueError:
+        # Stale or hand-edited cursor; start from the newest rows
+        return keyset_paginate(query, sort_column, id_column, per_page=per_page)
@@ -6,17 +6,25 @@ from flask import Blueprint, request
 
 from app.extensions import db
 from app.models import Lead
+from app.services import ingest, IngestError, IngestPending, invalidate_dashboard_stats, rate_limiter, idempotency
 from app.utils import (
     validate_required_fields,
     error_response,
     success_response,
-    require_json
+    accepted_response,
+    parse_bool,
+    require_json,
+    read_replica,
+    keyset_paginate,
+    requested_projection
 )
 
 lead_bp = Blueprint('lead', __name__)
 
 
 @lead_bp.route('/lead', methods=['POST'])
+@idempotency.idempotent
+@rate_limiter.limit('lead')
 @require_json
 def capture_lead():
     """
@@ -47,47 +55,97 @@ def capture_lead():
     if len(phone) < 7:
         return error_response('Invalid phone number')
     
-    # Create lead
-    lead = Lead(
-        name=data['name'].strip(),
-        phone=phone,
-        school=data.get('school', '').strip() or None,
-        address=data.get('address', '').strip() or None
-    )
+    payload = {
+        'name': data['name'].strip(),
+        'phone': phone,
+        'school': data.get('school', '').strip() or None,
+        'address': data.get('address', '').strip() or None
+    }
     
-    db.session.add(lead)
-    db.session.commit()
+    try:
+        result = ingest.submit('lead', payload)
+    except IngestPending:
+        return accepted_response('Lead received and queued for processing')
+    except IngestError as e:
+        return error_response(str(e), 503)
+    
+    invalidate_dashboard_stats()
     
     return success_response(
-        data={'lead_id': lead.id},
+        data=result,
         message='Lead captured successfully'
     )
 
 
+@ingest.handler('lead')
+def _stage_lead(payload, attempt):
+    """Add a lead to the session."""
+    lead = Lead(**payload)
+    db.session.add(lead)
+    
+    return lambda: {'lead_id': lead.id}
+
+
 @lead_bp.route('/leads', methods=['GET'])
+@read_replica
 def list_leads():
     """
     List all leads (for admin purposes).
     
+    Passing a cursor (an empty one for the first page) switches from
+    OFFSET paging to keyset paging on (created_at, id).
+    
     Query params:
+        - fields: 'detail' (default), 'summary' (without the address) or
+          a comma-separated field list
         - limit: Number of leads to return (default: 50)
         - offset: Pagination offset (default: 0)
+        - cursor: Keyset cursor from a previous next_cursor
+        - include_total: Whether to count all leads
+          (default: true with offset, false with cursor)
     
     Returns:
         JSON list of leads
     """
     limit = request.args.get('limit', 50, type=int)
     offset = request.args.get('offset', 0, type=int)
+    cursor = request.args.get('cursor')
+    include_total = request.args.get(
+        'include_total', cursor is None, type=parse_bool
+    )
     
     # Cap limit to prevent abuse
     limit = min(limit, 100)
     
-    leads = Lead.query.order_by(Lead.created_at.desc()).offset(offset).limit(limit).all()
-    total = Lead.query.count()
+    # Only the requested columns are read; the cursor needs created_at and id
+    try:
+        projection = requested_projection(Lead, request.args.get('fields'), ('id', 'created_at'))
+    except ValueError as e:
+        return error_response(str(e))
+    
+    if cursor is not None:
+        try:
+            page = keyset_paginate(
+                projection.query(), Lead.created_at, Lead.id,
+                after=cursor, per_page=limit
+            )
+        except ValueError:
+            return error_response('Invalid cursor')
+        
+        data = {
+            'leads': projection.rows(page.items),
+            'limit': limit,
+            'next_cursor': page.next_cursor
+        }
+    else:
+        leads = projection.query().order_by(Lead.created_at.desc()).offset(offset).limit(limit)
+        data = {
+            'leads': projection.rows(leads),
+            'limit': limit,
+            'offset': offset
+        }
+    
+    if include_total:
+        data['total'] = Lead.query.count()
     
-    return success_response(data={
-        'leads': [lead.to_dict() for lead in leads],
-        'total': total,
-        'limit': limit,
-        'offset': offset
-    })
+    return success_response(data=data)
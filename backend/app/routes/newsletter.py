@@ -6,10 +6,12 @@ from flask import Blueprint, request
 
 from app.extensions import db
 from app.models import Subscriber
+from app.services import ingest, IngestError, IngestPending, invalidate_dashboard_stats, rate_limiter
 from app.utils import (
     validate_email,
     error_response,
     success_response,
+    accepted_response,
     require_json
 )
 
@@ -17,6 +19,7 @@ newsletter_bp = Blueprint('newsletter', __name__)
 
 
 @newsletter_bp.route('/subscribe', methods=['POST'])
+@rate_limiter.limit('subscribe')
 @require_json
 def subscribe():
     """
@@ -41,29 +44,45 @@ def subscribe():
     if not validate_email(email):
         return error_response('Invalid email address')
     
+    try:
+        result = ingest.submit('subscribe', {'email': email})
+    except IngestPending:
+        return accepted_response('Subscription received and queued for processing')
+    except IngestError as e:
+        return error_response(str(e), 503)
+    
+    invalidate_dashboard_stats()
+    
+    return success_response(message=result['message'])
+
+
+@ingest.handler('subscribe')
+def _stage_subscription(payload, attempt):
+    """Add or reactivate a subscriber in the session."""
+    email = payload['email']
+    
     # Check if already subscribed
     existing = Subscriber.query.filter_by(email=email).first()
     
     if existing:
         if existing.is_active:
-            # Already subscribed, return success silently
-            return success_response(message='Already subscribed')
+            # Already subscribed, report success silently
+            message = 'Already subscribed'
         else:
             # Reactivate subscription
             existing.is_active = True
             existing.unsubscribed_at = None
-            db.session.commit()
-            return success_response(message='Subscription reactivated')
-    
-    # Create new subscriber
-    subscriber = Subscriber(email=email, is_active=True)
-    db.session.add(subscriber)
-    db.session.commit()
+            message = 'Subscription reactivated'
+    else:
+        # Create new subscriber
+        db.session.add(Subscriber(email=email, is_active=True))
+        message = 'Successfully subscribed to newsletter'
     
-    return success_response(message='Successfully subscribed to newsletter')
+    return lambda: {'message': message}
 
 
 @newsletter_bp.route('/unsubscribe', methods=['POST'])
+@rate_limiter.limit('subscribe')
 @require_json
 def unsubscribe():
     """
@@ -94,4 +113,6 @@ def unsubscribe():
     subscriber.unsubscribed_at = datetime.utcnow()
     db.session.commit()
     
+    invalidate_dashboard_stats()
+    
     return success_response(message='Successfully unsubscribed')
@@ -2,12 +2,16 @@
 Quote/Contact Form Routes
 Handles quote request submissions and ticket creation.
 """
+from datetime import datetime
+
 from flask import Blueprint, request
 
 from app.extensions import db
 from app.models import Ticket, Message
+from app.services import ingest, IngestError, invalidate_dashboard_stats, rate_limiter, idempotency
 from app.utils import (
     generate_ticket_id,
+    temporary_ticket_id,
     validate_required_fields,
     validate_email,
     error_response,
@@ -19,6 +23,8 @@ quote_bp = Blueprint('quote', __name__)
 
 
 @quote_bp.route('/quote', methods=['POST'])
+@idempotency.idempotent
+@rate_limiter.limit('quote')
 @require_json
 def create_quote():
     """
@@ -48,21 +54,51 @@ def create_quote():
     if not validate_email(data['email']):
         return error_response('Invalid email address')
     
-    # Generate unique ticket ID
-    ticket_id = generate_ticket_id()
+    payload = {
+        'name': data['name'].strip(),
+        'email': data['email'].strip().lower(),
+        'project_type': data['project_type'],
+        'message': data['message'].strip()
+    }
+    
+    # Never answered with 202: the ticket ID is the customer's only way back
+    try:
+        result = ingest.submit('quote', payload, deferrable=False)
+    except IngestError as e:
+        return error_response(str(e), 503)
     
-    # Ensure ticket ID is unique (regenerate if collision)
-    while Ticket.query.filter_by(ticket_id=ticket_id).first():
-        ticket_id = generate_ticket_id()
+    invalidate_dashboard_stats()
     
-    # Create ticket
+    return success_response(
+        data=result,
+        message='Quote request submitted successfully'
+    )
+
+
+@ingest.handler('quote')
+def _stage_quote(payload, attempt):
+    """
+    Add a ticket and its initial message to the session.
+    
+    The ticket is inserted with a placeholder ID; the real one is derived
+    from the primary key after the flush, so it is unique without a lookup.
+    Retries (attempt > 0) only step around IDs from the old random generator.
+    """
+    now = datetime.utcnow()
+    
+    # The conversation summary starts at the initial message; its id is
+    # filled in by the finalizer along with the ticket ID
     ticket = Ticket(
-        ticket_id=ticket_id,
-        name=data['name'].strip(),
-        email=data['email'].strip().lower(),
-        project_type=data['project_type'],
-        message=data['message'].strip(),
-        status=Ticket.STATUS_PENDING
+        ticket_id=temporary_ticket_id(),
+        name=payload['name'],
+        email=payload['email'],
+        project_type=payload['project_type'],
+        message=payload['message'],
+        status=Ticket.STATUS_PENDING,
+        message_count=1,
+        last_message_at=now,
+        last_sender=Message.SENDER_USER,
+        unread_count=1
     )
     
     db.session.add(ticket)
@@ -71,13 +107,14 @@ def create_quote():
     initial_message = Message(
         ticket=ticket,
         sender=Message.SENDER_USER,
-        message=data['message'].strip()
+        message=payload['message'],
+        created_at=now
     )
     db.session.add(initial_message)
     
-    db.session.commit()
+    def finalize():
+        ticket.ticket_id = generate_ticket_id(ticket.id, attempt)
+        ticket.last_message_id = initial_message.id
+        return {'ticket_id': ticket.ticket_id}
     
-    return success_response(
-        data={'ticket_id': ticket_id},
-        message='Quote request submitted successfully'
-    )
+    return finalize
@@ -2,22 +2,45 @@
 Ticket/Status Portal Routes
 Handles ticket retrieval and messaging for the status tracking portal.
 """
-from flask import Blueprint, request
+from datetime import datetime, timezone
+
+from flask import Blueprint, request, current_app
 
 from app.extensions import db
 from app.models import Ticket, Message
+from app.services import (
+    notifier,
+    ticket_channel,
+    invalidate_dashboard_stats,
+    ticket_search,
+    record_message,
+    rate_limiter,
+    idempotency
+)
 from app.utils import (
     validate_required_fields,
     error_response,
     success_response,
     json_response,
-    require_json
+    parse_bool,
+    etag_matches,
+    not_modified_response,
+    with_etag,
+    require_json,
+    read_replica,
+    keyset_paginate,
+    Projection,
+    requested_projection
 )
 
 ticket_bp = Blueprint('ticket', __name__)
 
+# Conversation responses are built from column tuples, not ORM objects
+MESSAGE_ROWS = Projection(Message, Message.DICT_FIELDS)
+
 
 @ticket_bp.route('/ticket/<ticket_id>', methods=['GET'])
+@read_replica
 def get_ticket(ticket_id):
     """
     Get ticket details by ticket ID.
@@ -26,29 +49,134 @@ def get_ticket(ticket_id):
         ticket_id: Ticket ID (e.g., OPT-A1B2)
     
     Returns:
-        JSON with ticket details
+        JSON with ticket details, or 304 if If-None-Match is current
     """
     # Normalize ticket ID to uppercase
     ticket_id = ticket_id.strip().upper()
     
-    ticket = Ticket.query.filter_by(ticket_id=ticket_id).first()
+    version = _ticket_version(ticket_id)
     
-    if not ticket:
+    if not version:
         return error_response('Ticket not found', 404)
     
-    return json_response(ticket.to_dict())
+    ticket_pk, etag = version
+    
+    if etag_matches(etag):
+        return not_modified_response(etag)
+    
+    ticket = db.session.get(Ticket, ticket_pk)
+    
+    return with_etag(json_response(ticket.to_dict()), etag)
 
 
 @ticket_bp.route('/ticket/<ticket_id>/messages', methods=['GET'])
+@read_replica
 def get_ticket_messages(ticket_id):
     """
-    Get all messages for a ticket.
+    Get messages for a ticket.
+    
+    Without query params the full conversation is returned as a JSON array.
+    Passing a cursor switches to incremental mode, which only returns
+    messages newer than the cursor together with the next cursor to use.
     
     Args:
         ticket_id: Ticket ID (e.g., OPT-A1B2)
     
+    Query params:
+        - after_id: Only return messages with an id greater than this
+        - since: Only return messages created after this ISO timestamp
+    
     Returns:
-        JSON array of messages
+        JSON array of messages, or in cursor mode:
+        {"messages": [...], "next_cursor": <last message id>}
+        304 if If-None-Match is current
+    """
+    # Normalize ticket ID to uppercase
+    ticket_id = ticket_id.strip().upper()
+    
+    version = _ticket_version(ticket_id)
+    
+    if not version:
+        return error_response('Ticket not found', 404)
+    
+    ticket_pk, etag = version
+    
+    if etag_matches(etag):
+        return not_modified_response(etag)
+    
+    after_id = request.args.get('after_id', type=int)
+    since_param = request.args.get('since')
+    
+    query = MESSAGE_ROWS.query().filter(Message.ticket_id == ticket_pk)
+    
+    if after_id is None and since_param is None:
+        messages = MESSAGE_ROWS.rows(query.order_by(Message.id.asc()))
+        return with_etag(json_response(messages), etag)
+    
+    if after_id is not None:
+        query = query.filter(Message.id > after_id)
+    
+    if since_param is not None:
+        since = _parse_since(since_param)
+        if since is None:
+            return error_response('Invalid since timestamp. Use ISO 8601 format')
+        query = query.filter(Message.created_at > since)
+    
+    messages = MESSAGE_ROWS.rows(query.order_by(Message.id.asc()))
+    next_cursor = messages[-1]['id'] if messages else after_id
+    
+    return with_etag(json_response({
+        'messages': messages,
+        'next_cursor': next_cursor
+    }), etag)
+
+
+def _ticket_version(ticket_id):
+    """
+    Look up a ticket's primary key and current ETag in a single query.
+    
+    The ETag combines the ticket's updated_at with its newest message id
+    (from the conversation summary), so it changes on status updates and
+    on every new message.
+    
+    Args:
+        ticket_id: Normalized ticket ID (e.g., OPT-A1B2)
+    
+    Returns:
+        tuple: (ticket primary key, etag), or None if not found
+    """
+    row = db.session.query(Ticket.id, Ticket.updated_at, Ticket.last_message_id).filter(
+        Ticket.ticket_id == ticket_id
+    ).first()
+    
+    if row is None:
+        return None
+    
+    ticket_pk, updated_at, last_id = row
+    stamp = updated_at.strftime('%Y%m%d%H%M%S%f') if updated_at else '0'
+    
+    return ticket_pk, f'{ticket_pk}-{stamp}-{last_id or 0}'
+
+
+@ticket_bp.route('/ticket/<ticket_id>/messages/wait', methods=['GET'])
+def wait_ticket_messages(ticket_id):
+    """
+    Long-poll for new messages or a status change on a ticket.
+    
+    Returns immediately if there are messages after the cursor, otherwise
+    parks the request until a reply or status change is published for the
+    ticket or the timeout expires.
+    
+    Args:
+        ticket_id: Ticket ID (e.g., OPT-A1B2)
+    
+    Query params:
+        - after_id: Id of the last message the client has (default: 0)
+        - timeout: Seconds to wait (capped at TICKET_LONGPOLL_TIMEOUT)
+    
+    Returns:
+        JSON {"messages": [...], "next_cursor": <id>, "status": <status>},
+        or 503 with Retry-After when TICKET_LONGPOLL_MAX_WAITERS are parked
     """
     # Normalize ticket ID to uppercase
     ticket_id = ticket_id.strip().upper()
@@ -58,12 +186,69 @@ def get_ticket_messages(ticket_id):
     if not ticket:
         return error_response('Ticket not found', 404)
     
-    messages = Message.query.filter_by(ticket_id=ticket.id).order_by(Message.created_at.asc()).all()
-    
-    return json_response([msg.to_dict() for msg in messages])
+    after_id = request.args.get('after_id', 0, type=int)
+    max_timeout = current_app.config['TICKET_LONGPOLL_TIMEOUT']
+    timeout = request.args.get('timeout', max_timeout, type=float)
+    timeout = max(0, min(timeout, max_timeout))
+    
+    # Read the version before querying so a commit in between still wakes us
+    channel = ticket_channel(ticket.id)
+    version = notifier.version(channel)
+    
+    ticket_pk = ticket.id
+    status = ticket.status
+    messages = _messages_after(ticket_pk, after_id)
+    
+    if not messages and timeout:
+        # Give the connection back (and drop SQLite read locks) while parked
+        db.session.close()
+        
+        new_version = notifier.wait(channel, version, timeout)
+        
+        if new_version is None:
+            # Every long-poll slot in this worker is taken
+            response = error_response('Too many open connections. Please retry shortly.', 503)
+            response.headers['Retry-After'] = '10'
+            return response
+        
+        if new_version != version:
+            ticket = db.session.get(Ticket, ticket_pk)
+            status = ticket.status
+            messages = _messages_after(ticket_pk, after_id)
+    
+    return json_response({
+        'messages': [msg.to_dict() for msg in messages],
+        'next_cursor': messages[-1].id if messages else after_id,
+        'status': status
+    })
+
+
+def _messages_after(ticket_pk, after_id):
+    """Fetch a ticket's messages with an id greater than after_id."""
+    return Message.query.filter(
+        Message.ticket_id == ticket_pk,
+        Message.id > after_id
+    ).order_by(Message.id.asc()).all()
+
+
+def _parse_since(value):
+    """Parse an ISO 8601 timestamp into a naive UTC datetime, or None."""
+    try:
+        since = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    
+    # Stored timestamps are naive UTC
+    if since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    
+    return since
 
 
 @ticket_bp.route('/ticket/<ticket_id>/message', methods=['POST'])
+@idempotency.idempotent
+@rate_limiter.limit('message')
+@rate_limiter.limit('ticket_message', key=lambda ticket_id: ticket_id.strip().upper())
 @require_json
 def add_ticket_message(ticket_id):
     """
@@ -111,8 +296,12 @@ def add_ticket_message(ticket_id):
     )
     
     db.session.add(message)
+    db.session.flush()
+    record_message(message)
     db.session.commit()
     
+    notifier.publish(ticket_channel(ticket.id))
+    
     return json_response(message.to_dict(), 201)
 
 
@@ -153,18 +342,31 @@ def update_ticket_status(ticket_id):
     ticket.status = status
     db.session.commit()
     
+    notifier.publish(ticket_channel(ticket.id))
+    invalidate_dashboard_stats()
+    
     return json_response(ticket.to_dict())
 
 
 @ticket_bp.route('/tickets', methods=['GET'])
+@read_replica
 def list_tickets():
     """
     List all tickets (admin endpoint).
     
+    Passing a cursor (an empty one for the first page) switches from
+    OFFSET paging to keyset paging on (created_at, id), which stays fast
+    on deep pages.
+    
     Query params:
         - status: Filter by status
+        - fields: 'detail' (default, as GET /ticket/<id>), 'summary'
+          (without the initial message) or a comma-separated field list
         - limit: Number of tickets to return (default: 50)
         - offset: Pagination offset (default: 0)
+        - cursor: Keyset cursor from a previous next_cursor
+        - include_total: Whether to count matching tickets
+          (default: true with offset, false with cursor)
     
     Returns:
         JSON list of tickets
@@ -172,21 +374,85 @@ def list_tickets():
     status = request.args.get('status')
     limit = request.args.get('limit', 50, type=int)
     offset = request.args.get('offset', 0, type=int)
+    cursor = request.args.get('cursor')
+    include_total = request.args.get(
+        'include_total', cursor is None, type=parse_bool
+    )
     
     # Cap limit
     limit = min(limit, 100)
     
-    query = Ticket.query
+    # Only the requested columns are read; the cursor needs created_at and id
+    try:
+        projection = requested_projection(Ticket, request.args.get('fields'), ('id', 'created_at'))
+    except ValueError as e:
+        return error_response(str(e))
+    
+    query = projection.query()
     
     if status:
-        query = query.filter_by(status=status)
+        query = query.filter(Ticket.status == status)
+    
+    if cursor is not None:
+        try:
+            page = keyset_paginate(
+                query, Ticket.created_at, Ticket.id,
+                after=cursor, per_page=limit
+            )
+        except ValueError:
+            return error_response('Invalid cursor')
+        
+        data = {
+            'tickets': projection.rows(page.items),
+            'limit': limit,
+            'next_cursor': page.next_cursor
+        }
+    else:
+        tickets = query.order_by(Ticket.created_at.desc()).offset(offset).limit(limit).all()
+        data = {
+            'tickets': projection.rows(tickets),
+            'limit': limit,
+            'offset': offset
+        }
+    
+    if include_total:
+        data['total'] = query.count()
+    
+    return success_response(data=data)
+
+
+@ticket_bp.route('/tickets/search', methods=['GET'])
+@read_replica
+def search_tickets():
+    """
+    Full-text search over tickets and their messages (admin endpoint).
     
-    tickets = query.order_by(Ticket.created_at.desc()).offset(offset).limit(limit).all()
-    total = query.count()
+    Query params:
+        - q: Search text (required)
+        - status: Filter by status
+        - page: 1-based page number (default: 1)
+        - limit: Number of tickets per page (default: 20, max 100)
+    
+    Returns:
+        JSON list of tickets, best match first
+    """
+    query = request.args.get('q', '').strip()
+    
+    if not query:
+        return error_response('Search query is required')
+    
+    limit = min(request.args.get('limit', 20, type=int), 100)
+    
+    results = ticket_search.search(
+        query,
+        status=request.args.get('status'),
+        page=request.args.get('page', 1, type=int),
+        per_page=limit
+    )
     
     return success_response(data={
-        'tickets': [t.to_dict() for t in tickets],
-        'total': total,
+        'tickets': [t.to_dict() for t in results.items],
+        'page': results.page,
         'limit': limit,
-        'offset': offset
+        'has_more': results.has_next
     })
@@ -0,0 +1,70 @@
+"""
+Services Package
+Exports application services shared across blueprints.
+"""
+from app.services.notifications import NotificationHub, notifier, ticket_channel
+from app.services.stats import get_dashboard_stats, invalidate_dashboard_stats
+from app.services.ingest import IngestQueue, IngestError, IngestPending, ingest
+from app.services.page_cache import PageCache, page_cache
+from app.services.assets import AssetManifest, assets, build_assets
+from app.services.images import ResponsiveImages, images, build_images
+from app.services.stylesheets import SiteStylesheet, site_stylesheet, build_css, fetch_fonts, fetch_tailwind, pin_downloads
+from app.services.exports import (
+    EXPORT_FORMATS,
+    export_response,
+    filter_date_range,
+    parse_date_range
+)
+from app.services.subscriber_import import read_emails, import_subscribers
+from app.services.search import TicketSearch, SearchPage, ticket_search, build_search_index
+from app.services.profiling import RequestProfiler, request_profiler
+from app.services.conversations import record_message, add_summary_columns, find_stale_summaries
+from app.services.rate_limit import RateLimiter, rate_limiter
+from app.services.idempotency import IdempotencyKeys, idempotency
+from app.services.schema import enable_ticket_autoincrement
+
+__all__ = [
+    'NotificationHub',
+    'notifier',
+    'ticket_channel',
+    'get_dashboard_stats',
+    'invalidate_dashboard_stats',
+    'IngestQueue',
+    'IngestError',
+    'IngestPending',
+    'ingest',
+    'PageCache',
+    'page_cache',
+    'AssetManifest',
+    'assets',
+    'build_assets',
+    'ResponsiveImages',
+    'images',
+    'build_images',
+    'SiteStylesheet',
+    'site_stylesheet',
+    'build_css',
+    'fetch_fonts',
+    'fetch_tailwind',
+    'pin_downloads',
+    'EXPORT_FORMATS',
+    'export_response',
+    'filter_date_range',
+    'parse_date_range',
+    'read_emails',
+    'import_subscribers',
+    'TicketSearch',
+    'SearchPage',
+    'ticket_search',
+    'build_search_index',
+    'RequestProfiler',
+    'request_profiler',
+    'record_message',
+    'add_summary_columns',
+    'find_stale_summaries',
+    'RateLimiter',
+    'rate_limiter',
+    'IdempotencyKeys',
+    'idempotency',
+    'enable_ticket_autoincrement'
+]
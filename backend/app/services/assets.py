@@ -0,0 +1,303 @@
+"""
+Static Assets
+Builds content-hashed, precompressed static files and serves them.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+
+from flask import request, send_from_directory, abort
+
+try:
+    import brotli
+except ImportError:
+    # Optional; without it only .gz variants are written
+    brotli = None
+
+# Build output and manifest live under <static folder>/dist
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+# Hashed files never change, so browsers may keep them for a year
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Extensions worth precompressing (images are already compressed)
+COMPRESSIBLE = {'.css', '.js', '.svg', '.json', '.txt', '.html', '.xml', '.ico'}
+
+# Suffix of each precompressed variant, in order of preference
+ENCODING_SUFFIXES = (('br', '.br'), ('gzip', '.gz'))
+
+
+class AssetManifest:
+    """
+    Maps static file names to their content-hashed build outputs.
+    
+    Once a manifest from `flask build-assets` is loaded,
+    url_for('static', filename='css/style.css') resolves to the hashed copy
+    under /static/dist/, so templates keep using plain url_for. Hashed files
+    are served with a year-long immutable Cache-Control, picking a
+    precompressed .br or .gz variant from Accept-Encoding. Without a
+    manifest (e.g. in development) the original files are served as before.
+    """
+    
+    def __init__(self, app=None):
+        self._manifest = {}
+        self._encodings = {}
+        self._dist_folder = None
+        
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        """Load the manifest and route hashed asset URLs."""
+        self._dist_folder = os.path.join(app.static_folder, DIST_DIR)
+        self._manifest = {}
+        self._encodings = {}
+        
+        if app.config.get('ASSET_MANIFEST', True):
+            self._load()
+        
+        app.add_url_rule(
+            f'{app.static_url_path}/{DIST_DIR}/<path:filename>',
+            endpoint='assets',
+            view_func=self._serve
+        )
+        app.url_defaults(self._hashed_static_url)
+        app.extensions['assets'] = self
+    
+    def _load(self):
+        """Read the manifest and note which precompressed variants exist."""
+        path = os.path.join(self._dist_folder, MANIFEST_NAME)
+        
+        try:
+            with open(path, encoding='utf-8') as f:
+                self._manifest = json.load(f)
+        except FileNotFoundError:
+            return
+        
+        self._encodings = {
+            hashed: {
+                encoding for encoding, suffix in ENCODING_SUFFIXES
+                if os.path.isfile(os.path.join(self._dist_folder, hashed + suffix))
+            }
+            for hashed in self._manifest.values()
+        }
+    
+    def _hashed_static_url(self, endpoint, values):
+        """url_defaults hook: swap a static filename for its hashed build."""
+        if endpoint != 'static':
+            return
+        
+        hashed = self._manifest.get(values.get('filename'))
+        if hashed:
+            values['filename'] = f'{DIST_DIR}/{hashed}'
+    
+    def _serve(self, filename):
+        """Serve a hashed file, precompressed when the client accepts it."""
+        encodings = self._encodings.get(filename)
+        if encodings is None:
+            abort(404)
+        
+        accepted = request.accept_encodings
+        for encoding, suffix in ENCODING_SUFFIXES:
+            if encoding in encodings and accepted[encoding]:
+                response = send_from_directory(
+                    self._dist_folder, filename + suffix,
+                    mimetype=mimetypes.guess_type(filename)[0]
+                )
+                response.headers['Content-Encoding'] = encoding
+                break
+        else:
+            response = send_from_directory(self._dist_folder, filename)
+        
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        response.vary.add('Accept-Encoding')
+        return response
+
+
+def build_assets(static_folder):
+    """
+    Write hashed, minified and precompressed copies of every static file.
+    
+    Other files are processed before CSS and JS, so '/static/...' paths
+    inside stylesheets and scripts can be rewritten to the hashed names.
+    The previous build is removed.
+    
+    Args:
+        static_folder: App static folder
+    
+    Returns:
+        dict: Manifest mapping original to hashed relative paths
+    
+    Raises:
+        RuntimeError: If rjsmin is not installed
+    """
+    dist_folder = os.path.join(static_folder, DIST_DIR)
+    shutil.rmtree(dist_folder, ignore_errors=True)
+    
+    sources = []
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != dist_folder)
+        for name in sorted(files):
+            sources.append(os.path.relpath(os.path.join(root, name), static_folder).replace(os.sep, '/'))
+    
+    # Stylesheets and scripts last, once the files they reference are hashed
+    sources.sort(key=lambda name: os.path.splitext(name)[1] in ('.css', '.js'))
+    
+    manifest = {}
+    for name in sources:
+        with open(os.path.join(static_folder, name), 'rb') as f:
+            content = f.read()
+        
+        ext = os.path.splitext(name)[1]
+        if ext == '.css':
+            content = minify_css(_rewrite_static_urls(content.decode('utf-8'), manifest)).encode('utf-8')
+        elif ext == '.js':
+            content = minify_js(_rewrite_static_urls(content.decode('utf-8'), manifest)).encode('utf-8')
+        
+        stem, _ = os.path.splitext(name)
+        hashed = f'{stem}.{hashlib.sha256(content).hexdigest()[:12]}{ext}'
+        _write(os.path.join(dist_folder, hashed), content)
+        
+        if ext in COMPRESSIBLE:
+            _write_compressed(os.path.join(dist_folder, hashed), content)
+        
+        manifest[name] = hashed
+    
+    _write(
+        os.path.join(dist_folder, MANIFEST_NAME),
+        json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8')
+    )
+    
+    return manifest
+
+
+def _rewrite_static_urls(text, manifest):
+    """Point '/static/<name>' references at already-built hashed files."""
+    def replace(match):
+        hashed = manifest.get(match.group(1))
+        return f'/static/{DIST_DIR}/{hashed}' if hashed else match.group(0)
+    
+    return re.sub(r'/static/([\w./-]+)', replace, text)
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content)
+
+
+def _write_compressed(path, content):
+    """Write .gz (and .br) variants when they are smaller than the original."""
+    variants = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(content, quality=11)
+    
+    for suffix, data in variants.items():
+        if len(data) < len(content):
+            _write(path + suffix, data)
+
+
+def _split_code(source):
+    """
+    Split CSS into (is_code, text) chunks, dropping comments.
+    
+    Strings are returned as non-code chunks so minification never touches
+    their contents. Comments become a single space so the tokens around
+    them stay apart.
+    """
+    chunks = []
+    code = []
+    i = start = 0
+    n = len(source)
+    
+    while i < n:
+        char = source[i]
+        
+        if char == '/' and source.startswith('*', i + 1):
+            code.append(source[start:i] + ' ')
+            end = source.find('*/', i + 2)
+            i = start = n if end == -1 else end + 2
+        elif char in '\'"':
+            code.append(source[start:i])
+            chunks.append((True, ''.join(code)))
+            code = []
+            end = _string_end(source, i)
+            chunks.append((False, source[i:end]))
+            i = start = end
+        else:
+            i += 1
+    
+    code.append(source[start:])
+    chunks.append((True, ''.join(code)))
+    return chunks
+
+
+def _string_end(source, index):
+    """Index just past the quoted string starting at index."""
+    quote = source[index]
+    i = index + 1
+    
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == quote:
+            return i + 1
+        i += 1
+    
+    return i
+
+
+def minify_css(source):
+    """
+    Strip comments and redundant whitespace from a stylesheet.
+    
+    Args:
+        source: CSS text
+    
+    Returns:
+        str: Minified CSS
+    """
+    parts = []
+    for is_code, text in _split_code(source.replace('\r\n', '\n')):
+        if is_code:
+            text = re.sub(r'\s+', ' ', text)
+            text = re.sub(r'\s*([{};,>])\s*', r'\1', text)
+            text = re.sub(r':\s+', ':', text)
+        parts.append(text)
+    
+    return ''.join(parts).replace(';}', '}').strip()
+
+
+def minify_js(source):
+    """
+    Minify a script with rjsmin.
+    
+    rjsmin tokenizes strings, template literals and regex literals, so
+    '//' or '/*' inside them is never mistaken for a comment.
+    
+    Args:
+        source: JavaScript text
+    
+    Returns:
+        str: Minified JavaScript
+    
+    Raises:
+        RuntimeError: If rjsmin is not installed
+    """
+    try:
+        import rjsmin
+    except ImportError:
+        raise RuntimeError('rjsmin is required to minify scripts: pip install rjsmin')
+    
+    return rjsmin.jsmin(source.replace('\r\n', '\n')) + '\n'
+
+
+# Shared manifest instance, initialized in create_app
+assets = AssetManifest()
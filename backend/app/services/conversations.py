@@ -0,0 +1,178 @@
+"""
+Conversation Summaries
+Maintains, backfills and checks the per-ticket message summary columns.
+"""
+from sqlalchemy import bindparam, case, func, inspect, select, text, update
+from sqlalchemy.orm import aliased
+
+from app.extensions import db
+from app.models import Ticket, Message
+
+# Summary columns on tickets, in the order they are compared and reported
+SUMMARY_FIELDS = ('message_count', 'last_message_id', 'last_message_at', 'last_sender', 'unread_count')
+
+
+def record_message(message):
+    """
+    Fold a newly flushed message into its ticket's summary.
+    
+    Issues one UPDATE in the caller's transaction, so the summary commits
+    or rolls back together with the message. Counters are incremented in
+    SQL and the last_* fields only move forward by message id, so
+    concurrent writers cannot lose updates or leave an older message as
+    the newest. The ticket's updated_at is left alone; it tracks ticket
+    changes, not conversation activity.
+    
+    Args:
+        message: Message that has been added and flushed (has an id)
+    """
+    table = Ticket.__table__
+    is_newer = func.coalesce(table.c.last_message_id, 0) < message.id
+    
+    if message.sender == Message.SENDER_USER:
+        unread_count = table.c.unread_count + 1
+    else:
+        unread_count = case((is_newer, 0), else_=table.c.unread_count)
+    
+    db.session.execute(
+        update(table)
+        .where(table.c.id == message.ticket_id)
+        .values(
+            message_count=table.c.message_count + 1,
+            last_message_id=case((is_newer, message.id), else_=table.c.last_message_id),
+            last_message_at=case((is_newer, message.created_at), else_=table.c.last_message_at),
+            last_sender=case((is_newer, message.sender), else_=table.c.last_sender),
+            unread_count=unread_count,
+            updated_at=table.c.updated_at
+        )
+    )
+
+
+def add_summary_columns():
+    """
+    Add the summary columns and their index to an existing tickets table.
+    
+    create_all only creates missing tables, so databases created before
+    the columns existed need this once before they are backfilled.
+    
+    Returns:
+        list: Names of the columns that were added
+    """
+    table = Ticket.__table__
+    existing = {column['name'] for column in inspect(db.engine).get_columns(table.name)}
+    dialect = db.engine.dialect
+    
+    added = []
+    for name in SUMMARY_FIELDS:
+        if name in existing:
+            continue
+        
+        column = table.c[name]
+        ddl = f'ALTER TABLE {table.name} ADD COLUMN {name} {column.type.compile(dialect)}'
+        if column.server_default is not None:
+            ddl += f" NOT NULL DEFAULT {column.server_default.arg}"
+        
+        db.session.execute(text(ddl))
+        added.append(name)
+    
+    db.session.commit()
+    
+    for index in table.indexes:
+        index.create(db.engine, checkfirst=True)
+    
+    return added
+
+
+def find_stale_summaries(chunk_size=1000, fix=False):
+    """
+    Compare every ticket's summary with its messages.
+    
+    Tickets are scanned chunk_size primary keys at a time; each chunk is
+    one grouped query over the (ticket_id, id) message index.
+    
+    Args:
+        chunk_size: Tickets per query (and per transaction when fixing)
+        fix: Rewrite the summaries that differ
+    
+    Returns:
+        list: (ticket_id, field names that differed) per stale ticket
+    """
+    table = Ticket.__table__
+    stale = []
+    
+    bounds = db.session.execute(select(func.min(table.c.id), func.max(table.c.id))).one()
+    if bounds[0] is None:
+        return stale
+    
+    fix_statement = (
+        update(table)
+        .where(table.c.id == bindparam('pk'))
+        .values({**{name: bindparam(name) for name in SUMMARY_FIELDS}, 'updated_at': table.c.updated_at})
+    )
+    
+    for low in range(bounds[0], bounds[1] + 1, chunk_size):
+        rows = db.session.execute(_summary_comparison(low, low + chunk_size)).all()
+        
+        changes = []
+        for row in rows:
+            expected = {
+                'message_count': row.expected_count or 0,
+                'last_message_id': row.expected_last_id,
+                'last_message_at': row.expected_last_at,
+                'last_sender': row.expected_last_sender,
+                'unread_count': row.expected_unread or 0
+            }
+            differing = [name for name in SUMMARY_FIELDS if getattr(row, name) != expected[name]]
+            if differing:
+                stale.append((row.ticket_id, differing))
+                changes.append({'pk': row.id, **expected})
+        
+        if fix and changes:
+            db.session.execute(fix_statement, changes)
+            db.session.commit()
+    
+    return stale
+
+
+def _summary_comparison(low, high):
+    """Stored and recomputed summaries for tickets with low <= id < high."""
+    totals = (
+        select(
+            Message.ticket_id,
+            func.count().label('message_count'),
+            func.max(Message.id).label('last_message_id'),
+            func.max(case((Message.sender == Message.SENDER_ADMIN, Message.id))).label('last_admin_id')
+        )
+        .where(Message.ticket_id >= low, Message.ticket_id < high)
+        .group_by(Message.ticket_id)
+        .subquery('totals')
+    )
+    
+    last = aliased(Message, name='last_message')
+    unread = aliased(Message, name='unread_message')
+    
+    unread_count = (
+        select(func.count())
+        .where(
+            unread.ticket_id == totals.c.ticket_id,
+            unread.id > func.coalesce(totals.c.last_admin_id, 0),
+            unread.sender == Message.SENDER_USER
+        )
+        .scalar_subquery()
+    )
+    
+    return (
+        select(
+            Ticket.id,
+            Ticket.ticket_id,
+            *(getattr(Ticket, name) for name in SUMMARY_FIELDS),
+            totals.c.message_count.label('expected_count'),
+            totals.c.last_message_id.label('expected_last_id'),
+            last.created_at.label('expected_last_at'),
+            last.sender.label('expected_last_sender'),
+            unread_count.label('expected_unread')
+        )
+        .outerjoin(totals, totals.c.ticket_id == Ticket.id)
+        .outerjoin(last, last.id == totals.c.last_message_id)
+        .where(Ticket.id >= low, Ticket.id < high)
+    )
@@ -0,0 +1,272 @@
+"""
+Idempotency Keys
+Replays the stored response when a client retries a write with the same Idempotency-Key.
+"""
+import functools
+import hashlib
+import itertools
+import logging
+import sqlite3
+import threading
+import time
+
+from flask import current_app, make_response, request
+
+from app.services.local_store import LocalSQLite
+from app.utils import error_response
+
+logger = logging.getLogger(__name__)
+
+# Longest accepted Idempotency-Key header (a UUID is 36 characters)
+MAX_KEY_LENGTH = 255
+
+# Seconds after which an unfinished claim (a worker died mid-request) may be retaken
+PENDING_TIMEOUT = 60
+
+# Responses worth replaying: the write finished, or (202) is journaled and
+# will run, so running the view again would store it twice
+STORED_STATUSES = (200, 201, 202)
+
+# Claim a key, or retake it if it has expired or its claim was abandoned.
+# A row comes back only if this request now owns the key.
+SQLITE_CLAIM = """
+    INSERT INTO idempotency_keys (key, fingerprint, status, body, mimetype, created)
+    VALUES (:key, :fingerprint, NULL, NULL, NULL, :now)
+    ON CONFLICT (key) DO UPDATE SET
+        fingerprint = excluded.fingerprint, status = NULL, body = NULL,
+        mimetype = NULL, created = excluded.created
+    WHERE created < :expired OR (status IS NULL AND created < :abandoned)
+    RETURNING key
+"""
+
+
+class StoredResponse:
+    """
+    What the store knows about a key.
+    
+    Attributes:
+        fingerprint: Hash of the request the key was first used with
+        status: Response status code, or None while the request is running
+        body: Response body (bytes)
+        mimetype: Response mimetype
+    """
+    
+    def __init__(self, fingerprint, status=None, body=None, mimetype=None):
+        self.fingerprint = fingerprint
+        self.status = status
+        self.body = body
+        self.mimetype = mimetype
+
+
+class MemoryKeys:
+    """
+    Idempotency keys in this worker's memory.
+    
+    A retry that reaches a different gunicorn worker is not recognised,
+    so prefer the 'sqlite' backend with more than one worker. Expired keys
+    are swept whenever the table grows past max_keys.
+    """
+    
+    def __init__(self, ttl, max_keys=10000):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._ttl = ttl
+        self._max_keys = max_keys
+    
+    def claim(self, key, fingerprint):
+        """Claim a key; return None if claimed, else its StoredResponse."""
+        now = time.time()
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not _reclaimable(entry[1], entry[0].status, now, self._ttl):
+                return entry[0]
+            
+            self._entries[key] = (StoredResponse(fingerprint), now)
+            if len(self._entries) > self._max_keys:
+                self._entries = {
+                    name: value for name, value in self._entries.items()
+                    if not _reclaimable(value[1], value[0].status, now, self._ttl)
+                }
+        return None
+    
+    def complete(self, key, status, body, mimetype):
+        """Store the response for a claimed key."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored = StoredResponse(entry[0].fingerprint, status, body, mimetype)
+                self._entries[key] = (stored, entry[1])
+    
+    def release(self, key):
+        """Forget an unfinished claim so the request can be retried."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0].status is None:
+                del self._entries[key]
+
+
+class SQLiteKeys:
+    """
+    Idempotency keys in a LocalSQLite file shared by all workers on the host.
+    
+    Keys and request fingerprints are stored as short digests, so a row is
+    a few dozen bytes plus the response body. Every PRUNE_EVERY claims,
+    expired keys are deleted.
+    """
+    
+    PRUNE_EVERY = 1000
+    
+    def __init__(self, path, ttl):
+        self._store = LocalSQLite(path, (
+            'CREATE TABLE IF NOT EXISTS idempotency_keys ('
+            'key BLOB PRIMARY KEY, fingerprint BLOB NOT NULL, status INTEGER, '
+            'body BLOB, mimetype TEXT, created REAL NOT NULL) WITHOUT ROWID',
+        ))
+        self._ttl = ttl
+        self._claims = itertools.count(1)
+    
+    def claim(self, key, fingerprint):
+        """Claim a key; return None if claimed, else its StoredResponse."""
+        now = time.time()
+        connection = self._store.connection()
+        
+        if next(self._claims) % self.PRUNE_EVERY == 0:
+            connection.execute('DELETE FROM idempotency_keys WHERE created < ?', (now - self._ttl,))
+        
+        claimed = connection.execute(SQLITE_CLAIM, {
+            'key': key,
+            'fingerprint': fingerprint,
+            'now': now,
+            'expired': now - self._ttl,
+            'abandoned': now - PENDING_TIMEOUT
+        }).fetchone()
+        if claimed is not None:
+            return None
+        
+        row = connection.execute(
+            'SELECT fingerprint, status, body, mimetype FROM idempotency_keys WHERE key = ?', (key,)
+        ).fetchone()
+        return StoredResponse(*row) if row else None
+    
+    def complete(self, key, status, body, mimetype):
+        """Store the response for a claimed key."""
+        self._store.connection().execute(
+            'UPDATE idempotency_keys SET status = ?, body = ?, mimetype = ? WHERE key = ?',
+            (status, body, mimetype, key)
+        )
+    
+    def release(self, key):
+        """Forget an unfinished claim so the request can be retried."""
+        self._store.connection().execute(
+            'DELETE FROM idempotency_keys WHERE key = ? AND status IS NULL', (key,)
+        )
+
+
+class IdempotencyKeys:
+    """
+    Makes write endpoints safe to retry with an Idempotency-Key header.
+    
+    Views opt in with @idempotency.idempotent. The first request with a
+    given key runs the view; a 200, 201 or 202 response is stored for
+    IDEMPOTENCY_TTL seconds and replayed, with an
+    Idempotent-Replayed header, to later requests with the same key and
+    body, without running the view again. A retry that arrives while the
+    first request is still running gets 409, and reusing a key for a
+    different request gets 422. Keys are scoped to the request path.
+    Requests without the header are unaffected, and if the store fails
+    the request runs normally.
+    """
+    
+    def __init__(self, app=None):
+        self._keys = None
+        
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        """Choose the key store backend from the app config."""
+        ttl = app.config.get('IDEMPOTENCY_TTL', 86400)
+        backend = app.config.get('IDEMPOTENCY_BACKEND', 'sqlite')
+        
+        if backend == 'sqlite':
+            self._keys = SQLiteKeys(app.config['IDEMPOTENCY_DB'], ttl)
+        elif backend == 'memory':
+            self._keys = MemoryKeys(ttl)
+        else:
+            raise ValueError(f"Unknown IDEMPOTENCY_BACKEND {backend!r}; use 'memory' or 'sqlite'")
+        
+        app.extensions['idempotency'] = self
+    
+    def idempotent(self, f):
+        """Decorator that runs a view at most once per Idempotency-Key."""
+        @functools.wraps(f)
+        def decorated_function(*args, **kwargs):
+            header = request.headers.get('Idempotency-Key')
+            if header is None:
+                return f(*args, **kwargs)
+            
+            if not header or len(header) > MAX_KEY_LENGTH:
+                return error_response(f'Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters')
+            
+            key = hashlib.sha256(f'{request.path}\n{header}'.encode('utf-8')).digest()[:16]
+            fingerprint = hashlib.sha256(request.get_data()).digest()[:16]
+            
+            try:
+                stored = self._keys.claim(key, fingerprint)
+            except sqlite3.Error:
+                logger.exception('Idempotency store failed; running request')
+                return f(*args, **kwargs)
+            
+            if stored is not None:
+                return _replay(stored, fingerprint)
+            
+            try:
+                response = make_response(f(*args, **kwargs))
+            except Exception:
+                self._release(key)
+                raise
+            
+            # Only accepted writes are replayed; errors wrote nothing, so a
+            # corrected retry with the same key may run
+            if response.status_code in STORED_STATUSES:
+                self._complete(key, response)
+            else:
+                self._release(key)
+            return response
+        return decorated_function
+    
+    def _complete(self, key, response):
+        try:
+            self._keys.complete(key, response.status_code, response.get_data(), response.mimetype)
+        except sqlite3.Error:
+            logger.exception('Could not store idempotent response')
+    
+    def _release(self, key):
+        try:
+            self._keys.release(key)
+        except sqlite3.Error:
+            logger.exception('Could not release idempotency key')
+
+
+def _reclaimable(created, status, now, ttl):
+    return created < now - ttl or (status is None and created < now - PENDING_TIMEOUT)
+
+
+def _replay(stored, fingerprint):
+    """Response for a key that has been seen before."""
+    if stored.fingerprint != fingerprint:
+        return error_response('Idempotency-Key was already used for a different request', 422)
+    
+    if stored.status is None:
+        response = error_response('A request with this Idempotency-Key is still in progress', 409)
+        response.headers['Retry-After'] = '1'
+        return response
+    
+    response = current_app.response_class(stored.body, status=stored.status, mimetype=stored.mimetype)
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+# Shared key store instance, initialized in create_app
+idempotency = IdempotencyKeys()
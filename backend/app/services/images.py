@@ -0,0 +1,163 @@
+"""
+Responsive Images
+Builds resized WebP/AVIF derivatives and renders <picture> markup for them.
+"""
+import glob
+import json
+import os
+import shutil
+
+from flask import url_for
+from markupsafe import Markup, escape
+
+# Source images, relative to the static folder
+IMAGE_SOURCES = ('logo.png', 'images/*.png', 'images/*.jpg')
+
+# Derivatives and their manifest, relative to the static folder
+DERIVED_DIR = 'images/derived'
+MANIFEST_NAME = 'manifest.json'
+
+# Candidate widths; each source also gets one at its own width
+WIDTHS = (64, 128, 256, 320, 480, 640, 960, 1280)
+
+# (MIME type, Pillow format, save options), best compression first
+FORMATS = (
+    ('image/avif', 'AVIF', {'quality': 60}),
+    ('image/webp', 'WEBP', {'quality': 80, 'method': 6}),
+)
+
+
+class ResponsiveImages:
+    """
+    Renders static images as <picture> elements with AVIF/WebP srcsets.
+    
+    Templates call picture('images/admin-dashboard.png', 'Alt text',
+    sizes='50vw', class='w-full'). Images listed in the manifest written by
+    `flask build-images` get a <source> per format so the browser downloads
+    the smallest file that fits the slot; the original stays the <img>
+    fallback. Without a manifest a plain <img> is rendered.
+    """
+    
+    def __init__(self, app=None):
+        self._manifest = {}
+        
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        """Load the derivative manifest and expose picture() to templates."""
+        path = os.path.join(app.static_folder, DERIVED_DIR, MANIFEST_NAME)
+        
+        try:
+            with open(path, encoding='utf-8') as f:
+                self._manifest = json.load(f)
+        except FileNotFoundError:
+            self._manifest = {}
+        
+        app.add_template_global(self.picture, 'picture')
+        app.extensions['images'] = self
+    
+    def picture(self, filename, alt, sizes='100vw', loading='lazy', **attrs):
+        """
+        Render responsive markup for a static image.
+        
+        Args:
+            filename: Image path relative to the static folder
+            alt: Alt text
+            sizes: Rendered width of the image slot, as in the sizes attribute
+            loading: 'lazy', or 'eager' for above-the-fold images
+            **attrs: Extra <img> attributes (class, id, fetchpriority, ...)
+        
+        Returns:
+            Markup: <picture> element, or <img> if there are no derivatives
+        """
+        entry = self._manifest.get(filename)
+        
+        img_attrs = {'src': url_for('static', filename=filename), 'alt': alt}
+        if entry:
+            img_attrs['width'] = entry['width']
+            img_attrs['height'] = entry['height']
+        img_attrs['loading'] = loading
+        img_attrs['decoding'] = 'async'
+        img_attrs.update(attrs)
+        
+        img = f'<img{_render_attrs(img_attrs)}>'
+        if not entry:
+            return Markup(img)
+        
+        sources = []
+        for mimetype, variants in entry['variants'].items():
+            srcset = ', '.join(
+                f'{url_for("static", filename=path)} {width}w' for width, path in variants
+            )
+            sources.append(f'<source{_render_attrs({"type": mimetype, "srcset": srcset, "sizes": sizes})}>')
+        
+        # display: contents keeps the <img> laid out as a direct child
+        return Markup(f'<picture style="display: contents">{"".join(sources)}{img}</picture>')
+
+
+def _render_attrs(attrs):
+    return ''.join(f' {name}="{escape(value)}"' for name, value in attrs.items() if value is not None)
+
+
+def build_images(static_folder):
+    """
+    Write resized AVIF/WebP derivatives of IMAGE_SOURCES and their manifest.
+    
+    The previous build is removed. Formats the installed Pillow cannot
+    encode are skipped.
+    
+    Args:
+        static_folder: App static folder
+    
+    Returns:
+        dict: Manifest keyed by source path
+    
+    Raises:
+        RuntimeError: If Pillow is not installed
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        raise RuntimeError('Pillow is required to build images: pip install Pillow')
+    
+    Image.init()
+    formats = [f for f in FORMATS if f[1] in Image.SAVE]
+    
+    derived_folder = os.path.join(static_folder, DERIVED_DIR)
+    shutil.rmtree(derived_folder, ignore_errors=True)
+    os.makedirs(derived_folder)
+    
+    manifest = {}
+    for pattern in IMAGE_SOURCES:
+        for path in sorted(glob.glob(os.path.join(static_folder, pattern))):
+            name = os.path.relpath(path, static_folder).replace(os.sep, '/')
+            stem = os.path.splitext(os.path.basename(name))[0]
+            
+            with Image.open(path) as source:
+                source.load()
+                width, height = source.size
+                widths = sorted({w for w in WIDTHS if w < width} | {width})
+                
+                variants = {}
+                for mimetype, image_format, options in formats:
+                    variants[mimetype] = []
+                    for target in widths:
+                        resized = source.resize(
+                            (target, max(1, round(height * target / width))),
+                            Image.LANCZOS
+                        )
+                        out_name = f'{DERIVED_DIR}/{stem}-{target}w.{image_format.lower()}'
+                        resized.save(os.path.join(static_folder, out_name), image_format, **options)
+                        variants[mimetype].append([target, out_name])
+            
+            manifest[name] = {'width': width, 'height': height, 'variants': variants}
+    
+    with open(os.path.join(derived_folder, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    
+    return manifest
+
+
+# Shared helper instance, initialized in create_app
+images = ResponsiveImages()
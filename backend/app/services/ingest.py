@@ -0,0 +1,539 @@
+"""
+Ingestion Queue
+Stores public form submissions, optionally through a batching writer.
+"""
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app.extensions import db
+
+logger = logging.getLogger(__name__)
+
+# MySQL errors worth retrying: lock wait timeout, deadlock, lost connection
+TRANSIENT_MYSQL_ERRORS = {1205, 1213, 2006, 2013}
+
+# One row per journaled submission, committed with it, so replaying a
+# journal skips submissions that were already stored
+ingest_receipts = db.Table(
+    'ingest_receipts',
+    db.Column('token', db.String(32), primary_key=True),
+    db.Column('created_at', db.DateTime, nullable=False)
+)
+
+
+class IngestError(Exception):
+    """Raised when a submission could not be stored."""
+
+
+class IngestPending(Exception):
+    """Raised when a submission is journaled but not committed in time."""
+
+
+class _Submission:
+    """A queued submission and the slot its result is delivered to."""
+    
+    QUEUED = 'queued'
+    CLAIMED = 'claimed'
+    CANCELLED = 'cancelled'
+    
+    def __init__(self, kind, payload, token=None):
+        self.kind = kind
+        self.payload = payload
+        self.token = token
+        self.result = None
+        self.error = None
+        self.state = self.QUEUED
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+    
+    def claim(self):
+        """Take ownership for the writer unless the caller gave up first."""
+        with self._lock:
+            if self.state == self.QUEUED:
+                self.state = self.CLAIMED
+            return self.state == self.CLAIMED
+    
+    def cancel(self):
+        """Withdraw an unclaimed submission; returns False if already claimed."""
+        with self._lock:
+            if self.state == self.QUEUED:
+                self.state = self.CANCELLED
+            return self.state == self.CANCELLED
+    
+    def resolve(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self._done.set()
+    
+    def done(self):
+        return self._done.is_set()
+    
+    def wait(self, timeout):
+        return self._done.wait(timeout)
+
+
+class IngestQueue:
+    """
+    Writes form submissions to the database.
+    
+    Each submission kind has a handler (registered with @ingest.handler)
+    that adds its rows to db.session and returns a finalizer. The finalizer
+    runs after the flush, once primary keys are known, and returns the
+    result dict for the caller.
+    
+    In 'sync' mode submissions are written on the request thread. In
+    'batched' mode a writer thread in each worker drains the queue, appends
+    the batch to a local journal with a single fsync, inserts the whole batch
+    in one transaction and then clears the journal. Callers wait for their
+    batch to commit so they still get generated IDs. A worker that finds the
+    journal of a dead process replays it. Each submission commits with a
+    receipt row, so a replay skips what was already stored and every
+    journaled submission is stored exactly once.
+    
+    A batch that finds the database busy or locked is retried a few
+    times; after that, or on any other error, its records are written one
+    at a time and the ones that still fail are reported to their callers.
+    If journaling or writing a batch fails outright, every caller still
+    waiting gets IngestError and the writer carries on with the next batch.
+    Journal lines that cannot be decoded (a write torn by a crash) and
+    replayed records that cannot be stored are moved to a .quarantine file
+    next to the journal. A recovery that fails is retried between later
+    batches, and a writer thread that has died is restarted on the next
+    submission.
+    """
+    
+    # Attempts per submission when a commit hits a unique constraint
+    MAX_ATTEMPTS = 5
+    
+    # Attempts per batch while the database is busy or locked
+    MAX_BATCH_ATTEMPTS = 5
+    
+    # Receipts are deleted after this long, every PRUNE_EVERY batches
+    RECEIPT_RETENTION = timedelta(days=7)
+    PRUNE_EVERY = 1000
+    
+    # Seconds before a failed journal recovery is tried again
+    RECOVER_RETRY = 30
+    
+    def __init__(self, app=None):
+        self._handlers = {}
+        self._app = None
+        self._mode = 'sync'
+        self._queue = queue.Queue()
+        self._writer_lock = threading.Lock()
+        self._writer_pid = None
+        self._writer = None
+        self._journal = None
+        self._recovered = False
+        self._recover_after = 0
+        self._batches = itertools.count(1)
+        
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        """Read ingestion settings from the app config."""
+        self._app = app
+        self._mode = app.config.get('INGEST_MODE', 'sync')
+        self._journal_dir = app.config.get('INGEST_JOURNAL_DIR')
+        self._batch_size = app.config.get('INGEST_BATCH_SIZE', 100)
+        self._batch_wait = app.config.get('INGEST_BATCH_WAIT_MS', 5) / 1000
+        self._commit_timeout = app.config.get('INGEST_COMMIT_TIMEOUT', 5)
+        app.extensions['ingest'] = self
+    
+    @property
+    def batched(self):
+        """Whether submissions go through the background writer."""
+        return self._mode == 'batched'
+    
+    def handler(self, kind):
+        """
+        Register the handler for a submission kind.
+        
+        The handler is called as handler(payload, attempt) and must return a
+        zero-argument finalizer producing the result dict. attempt counts
+        retries after a unique constraint failure.
+        """
+        def decorator(f):
+            self._handlers[kind] = f
+            return f
+        return decorator
+    
+    def submit(self, kind, payload, deferrable=True):
+        """
+        Store a validated submission.
+        
+        Args:
+            kind: Registered submission kind (e.g. 'quote')
+            payload: JSON-serializable dict passed to the handler
+            deferrable: Whether the caller can do without the result. If
+                False, a submission the writer has taken is waited for past
+                INGEST_COMMIT_TIMEOUT instead of raising IngestPending
+        
+        Returns:
+            dict: Handler result, e.g. {'ticket_id': 'OPT-A1B2'}
+        
+        Raises:
+            IngestPending: Batched mode; journaled but not yet committed
+            IngestError: The submission could not be stored
+        """
+        if not self.batched:
+            return self._write_one(kind, payload)
+        
+        writer = self._ensure_writer()
+        
+        submission = _Submission(kind, payload, uuid.uuid4().hex)
+        self._queue.put(submission)
+        
+        if not submission.wait(self._commit_timeout):
+            if submission.cancel():
+                raise IngestError('Submission queue is busy, please try again')
+            if deferrable:
+                raise IngestPending()
+            # Claimed batches always finish (busy retries are bounded and a
+            # failed batch resolves its submissions) unless the writer died
+            while not submission.wait(self._commit_timeout):
+                if not writer.is_alive():
+                    raise IngestError('Could not store submission, please try again')
+        
+        if submission.error is not None:
+            raise submission.error
+        
+        return submission.result
+    
+    def _write_one(self, kind, payload, token=None):
+        """Write a single submission (and its receipt) in its own transaction."""
+        handler = self._handlers[kind]
+        
+        for attempt in range(self.MAX_ATTEMPTS):
+            finalize = handler(payload, attempt)
+            try:
+                db.session.flush()
+                result = finalize()
+                if token is not None:
+                    _add_receipts([token])
+                db.session.commit()
+                return result
+            except IntegrityError:
+                db.session.rollback()
+        
+        raise IngestError('Could not store submission, please try again')
+    
+    def _write_batch(self, batch):
+        """Write a batch in one transaction, isolating failures per record."""
+        for attempt in range(1, self.MAX_BATCH_ATTEMPTS + 1):
+            try:
+                finalizers = [self._handlers[s.kind](s.payload, 0) for s in batch]
+                db.session.flush()
+                results = [finalize() for finalize in finalizers]
+                _add_receipts([s.token for s in batch if s.token is not None])
+                db.session.commit()
+            except OperationalError as e:
+                db.session.rollback()
+                if not _is_transient(e) or attempt == self.MAX_BATCH_ATTEMPTS:
+                    logger.exception('Ingest batch failed, writing records one at a time')
+                    break
+                # Database busy; the batch is safe in the journal
+                logger.warning('Ingest batch hit a busy database (attempt %d), retrying', attempt)
+                time.sleep(attempt * 0.5)
+                continue
+            except Exception:
+                db.session.rollback()
+                break
+            
+            for submission, result in zip(batch, results):
+                submission.resolve(result=result)
+            return
+        
+        # Something in the batch is bad; write records one at a time
+        for submission in batch:
+            try:
+                submission.resolve(result=self._write_one(submission.kind, submission.payload, submission.token))
+            except IngestError as e:
+                logger.warning('Ingest of %s submission failed: %s', submission.kind, e)
+                submission.resolve(error=e)
+            except Exception:
+                db.session.rollback()
+                logger.exception('Ingest of %s submission failed', submission.kind)
+                submission.resolve(error=IngestError('Could not store submission'))
+    
+    def _writer_running(self):
+        return self._writer_pid == os.getpid() and self._writer.is_alive()
+    
+    def _ensure_writer(self):
+        """Start this worker's writer thread, or restart it if it died; returns the thread."""
+        if self._writer_running():
+            return self._writer
+        
+        with self._writer_lock:
+            if self._writer_running():
+                return self._writer
+            
+            if self._writer_pid != os.getpid():
+                # Fresh queue and journal: a forked copy of the parent's may
+                # hold locks, and its journal belongs to the parent
+                self._queue = queue.Queue()
+                self._journal = None
+                self._recovered = False
+                self._writer_pid = os.getpid()
+            else:
+                logger.error('Ingest writer thread died; restarting it')
+            
+            self._writer = threading.Thread(target=self._run, name='ingest-writer', daemon=True)
+            self._writer.start()
+            return self._writer
+    
+    def _run(self):
+        with self._app.app_context():
+            while True:
+                # Before claiming anything, so callers never wait on a replay
+                if not self._recovered and time.monotonic() >= self._recover_after:
+                    self._try_recover()
+                
+                batch = self._next_batch()
+                if batch:
+                    self._store(batch)
+    
+    def _store(self, batch):
+        """Journal and write one batch; on failure, report it to every waiting caller."""
+        try:
+            self._journal_append(batch)
+            self._write_batch(batch)
+            self._journal_clear()
+            
+            if next(self._batches) % self.PRUNE_EVERY == 0:
+                self._prune_receipts()
+        except Exception:
+            logger.exception('Ingest batch of %d submissions failed', len(batch))
+            db.session.rollback()
+            
+            for submission in batch:
+                if not submission.done():
+                    submission.resolve(error=IngestError('Could not store submission, please try again'))
+            
+            # The callers were told it failed, so it must not be replayed
+            # (committed records are skipped by their receipts anyway)
+            try:
+                self._journal_clear()
+            except Exception:
+                logger.exception('Could not clear the ingest journal')
+                self._journal = None
+    
+    def _try_recover(self):
+        """Replay dead workers' journals, scheduling a retry if that fails."""
+        try:
+            self._recover()
+        except Exception:
+            logger.exception('Ingest journal recovery failed; retrying in %d seconds', self.RECOVER_RETRY)
+            db.session.rollback()
+            self._recover_after = time.monotonic() + self.RECOVER_RETRY
+        else:
+            self._recovered = True
+    
+    def _next_batch(self):
+        """Block for one submission, then gather more for up to the batch wait."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self._batch_wait
+        
+        while len(batch) < self._batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    # Past the wait, still take whatever is already queued
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        
+        return [s for s in batch if s.claim()]
+    
+    def _journal_path(self, pid):
+        return os.path.join(self._journal_dir, f'{pid}.jsonl')
+    
+    def _open_journal(self):
+        os.makedirs(self._journal_dir, exist_ok=True)
+        self._journal = open(self._journal_path(os.getpid()), 'a', encoding='utf-8')
+    
+    def _journal_append(self, batch):
+        """Make the batch durable with one fsync before touching the DB."""
+        if self._journal is None:
+            self._open_journal()
+        
+        for submission in batch:
+            self._journal.write(json.dumps({
+                'kind': submission.kind,
+                'payload': submission.payload,
+                'token': submission.token
+            }) + '\n')
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+    
+    def _journal_clear(self):
+        """Everything journaled so far is committed."""
+        if self._journal is not None:
+            self._journal.truncate(0)
+    
+    def _recover(self):
+        """
+        Replay journals left behind by workers that are no longer running.
+        
+        A file named after our pid belongs to an earlier process unless our
+        own journal is open, and is replayed. A replay file claimed by this
+        process is left over from a failed recovery and is replayed again.
+        
+        Raises:
+            OSError, SQLAlchemyError: A journal could not be replayed; it
+                keeps its .replay-<pid> name for the next attempt
+        """
+        os.makedirs(self._journal_dir, exist_ok=True)
+        
+        for name in os.listdir(self._journal_dir):
+            base, _, replayer = name.partition('.replay-')
+            if not base.endswith('.jsonl'):
+                continue
+            
+            owner = replayer or base[:-len('.jsonl')]
+            if not owner.isdigit():
+                continue
+            if int(owner) != os.getpid() and _pid_alive(int(owner)):
+                continue
+            if not replayer and self._journal is not None and int(owner) == os.getpid():
+                continue
+            
+            # Claim the file so only one worker replays it
+            path = os.path.join(self._journal_dir, name)
+            replay_path = os.path.join(self._journal_dir, f'{base}.replay-{os.getpid()}')
+            try:
+                os.rename(path, replay_path)
+            except OSError:
+                continue
+            
+            with open(replay_path, encoding='utf-8') as f:
+                records, rejected = self._read_journal(f)
+            
+            # Skip submissions whose receipt shows they were committed
+            # before the process died, ahead of clearing its journal
+            stored = _stored_tokens([r.get('token') for r in records])
+            batch = [
+                _Submission(r['kind'], r['payload'], r.get('token'))
+                for r in records if r.get('token') not in stored
+            ]
+            
+            if batch:
+                logger.warning('Replaying %d journaled submissions from %s (%d already stored)',
+                               len(batch), name, len(records) - len(batch))
+                for start in range(0, len(batch), self._batch_size):
+                    self._write_batch(batch[start:start + self._batch_size])
+                
+                rejected.extend(
+                    json.dumps({'kind': s.kind, 'payload': s.payload, 'token': s.token})
+                    for s in batch if s.error is not None
+                )
+            
+            if rejected:
+                quarantine_path = os.path.join(self._journal_dir, f'{base}.quarantine')
+                logger.error('Moved %d unreplayable journal lines from %s to %s',
+                             len(rejected), name, quarantine_path)
+                with open(quarantine_path, 'a', encoding='utf-8') as f:
+                    f.writelines(line + '\n' for line in rejected)
+            
+            os.unlink(replay_path)
+        
+        self._prune_receipts()
+    
+    def _read_journal(self, lines):
+        """
+        Decode journal lines.
+        
+        Returns:
+            tuple: (records, raw lines that are not a known submission)
+        """
+        records = []
+        rejected = []
+        
+        for line in lines:
+            line = line.rstrip('\n')
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Torn write from a crash before the fsync finished
+                rejected.append(line)
+                continue
+            
+            if not isinstance(record, dict) or record.get('kind') not in self._handlers or 'payload' not in record:
+                rejected.append(line)
+                continue
+            records.append(record)
+        
+        return records, rejected
+    
+    def _prune_receipts(self):
+        """Delete receipts old enough that no journal can still hold them."""
+        try:
+            db.session.execute(
+                ingest_receipts.delete()
+                .where(ingest_receipts.c.created_at < datetime.utcnow() - self.RECEIPT_RETENTION)
+            )
+            db.session.commit()
+        except OperationalError:
+            db.session.rollback()
+            logger.exception('Could not prune ingest receipts')
+
+
+def _add_receipts(tokens):
+    """Stage receipts for submissions in the current transaction."""
+    if tokens:
+        now = datetime.utcnow()
+        db.session.execute(ingest_receipts.insert(), [{'token': token, 'created_at': now} for token in tokens])
+
+
+def _stored_tokens(tokens):
+    """Which of these submission tokens have a committed receipt."""
+    tokens = [token for token in tokens if token]
+    stored = set()
+    
+    # Stay under SQLite's bound parameter limit
+    for start in range(0, len(tokens), 500):
+        stored.update(db.session.scalars(
+            db.select(ingest_receipts.c.token).where(ingest_receipts.c.token.in_(tokens[start:start + 500]))
+        ))
+    
+    return stored
+
+
+def _is_transient(error):
+    """Whether an OperationalError is a busy/locked database worth retrying."""
+    orig = error.orig
+    code = orig.args[0] if getattr(orig, 'args', None) else None
+    if code in TRANSIENT_MYSQL_ERRORS:
+        return True
+    
+    message = str(orig).lower()
+    return 'database is locked' in message or 'database is busy' in message or 'database table is locked' in message
+
+
+def _pid_alive(pid):
+    """Check whether a process with this pid exists."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# Shared queue instance, initialized in create_app
+ingest = IngestQueue()
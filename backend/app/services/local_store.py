@@ -0,0 +1,48 @@
+"""
+Local SQLite Store
+Small SQLite files shared by the worker processes on one host.
+"""
+import os
+import sqlite3
+import threading
+
+
+class LocalSQLite:
+    """
+    Per-thread connections to a scratch SQLite file outside the main database.
+    
+    Used for state that every gunicorn worker on the host must see but
+    that is cheap to lose (rate-limit buckets, idempotency keys). The file
+    runs in WAL mode with synchronous=OFF and autocommit, so a statement
+    costs tens of microseconds and never waits on the main database's
+    writer. Connections are opened per thread and per process, so an app
+    preloaded before forking still gets its own connections.
+    """
+    
+    def __init__(self, path, schema):
+        """
+        Args:
+            path: Database file; its directory is created on first use
+            schema: CREATE ... IF NOT EXISTS statements run on each new connection
+        """
+        self._path = path
+        self._schema = schema
+        self._local = threading.local()
+    
+    def connection(self):
+        """Return this thread's connection, opening it if needed."""
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            
+            connection = sqlite3.connect(self._path, isolation_level=None, check_same_thread=False, timeout=1)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=OFF')
+            for statement in self._schema:
+                connection.execute(statement)
+            
+            local.connection = connection
+            local.pid = os.getpid()
+        return local.connection
@@ -0,0 +1,217 @@
+"""
+Notification Hub
+Wakes long-polling requests when a ticket conversation changes.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Channels remembered per worker; idle ones beyond this are forgotten
+MAX_CHANNELS = 10000
+
+
+def ticket_channel(ticket_pk):
+    """
+    Build the notification channel name for a ticket.
+    
+    Args:
+        ticket_pk: Ticket primary key (not the OPT-XXXX id)
+    
+    Returns:
+        str: Channel name like 'ticket:42'
+    """
+    return f'ticket:{ticket_pk}'
+
+
+class NotificationHub:
+    """
+    In-process pub/sub keyed by channel name.
+    
+    Every channel carries a version, taken from one counter that only
+    grows. Waiters remember the version they last saw and sleep on a
+    condition variable until it moves or the timeout expires, so parked
+    requests cost no database queries. Past MAX_CHANNELS, the least
+    recently published channels with nobody waiting are forgotten; they
+    read as version 0, which never equals a version handed out before, so
+    a forgotten channel only causes a spurious wake-up.
+    
+    Each parked request holds a server thread, so at most max_waiters wait
+    at once per worker; further waits return None straight away.
+    
+    Gunicorn runs several worker processes, so a publish is also sent as a
+    Unix datagram to every other worker's socket in NOTIFY_SOCKET_DIR. Each
+    worker binds its socket when the app is initialized, and again in a
+    forked child if the app was preloaded, so no publish is missed.
+    """
+    
+    def __init__(self, app=None):
+        self._cond = threading.Condition()
+        self._versions = {}
+        self._sequence = 0
+        self._waiting = {}
+        self._max_waiters = None
+        self._socket_dir = None
+        self._listener_lock = threading.Lock()
+        self._listener_pid = None
+        self._fork_hook = False
+        
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        """Read hub settings from the app config and bind this worker's socket."""
+        self._socket_dir = app.config.get('NOTIFY_SOCKET_DIR')
+        self._max_waiters = app.config.get('TICKET_LONGPOLL_MAX_WAITERS')
+        app.extensions['notifier'] = self
+        
+        self._ensure_listener()
+        if not self._fork_hook and hasattr(os, 'register_at_fork'):
+            # A preloaded app forks workers after init_app; bind in each child
+            os.register_at_fork(after_in_child=self._ensure_listener)
+            self._fork_hook = True
+    
+    def version(self, channel):
+        """Return the current version of a channel."""
+        with self._cond:
+            return self._versions.get(channel, 0)
+    
+    def wait(self, channel, version, timeout):
+        """
+        Block until the channel moves past the given version.
+        
+        Args:
+            channel: Channel name
+            version: Version the caller has already seen
+            timeout: Maximum seconds to wait
+        
+        Returns:
+            int: The channel version when the wait ended, or None without
+                waiting if max_waiters requests are already parked
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            if self._max_waiters is not None and sum(self._waiting.values()) >= self._max_waiters:
+                return None
+            
+            # Channels with waiters are never forgotten
+            self._waiting[channel] = self._waiting.get(channel, 0) + 1
+            try:
+                while self._versions.get(channel, 0) == version:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                return self._versions.get(channel, 0)
+            finally:
+                self._waiting[channel] -= 1
+                if not self._waiting[channel]:
+                    del self._waiting[channel]
+    
+    def publish(self, channel):
+        """Wake everyone waiting on a channel, in this and other workers."""
+        self._bump(channel)
+        self._broadcast(channel)
+    
+    def _bump(self, channel):
+        with self._cond:
+            self._sequence += 1
+            # Re-insert so the dict stays in least recently published order
+            self._versions.pop(channel, None)
+            self._versions[channel] = self._sequence
+            if len(self._versions) > MAX_CHANNELS:
+                self._forget_idle_channels()
+            self._cond.notify_all()
+    
+    def _forget_idle_channels(self):
+        """Drop the oldest channels nobody is waiting on, down to half the limit."""
+        excess = len(self._versions) - MAX_CHANNELS // 2
+        for name in list(self._versions):
+            if excess <= 0:
+                break
+            if name not in self._waiting:
+                del self._versions[name]
+                excess -= 1
+    
+    def _cross_process_enabled(self):
+        return bool(self._socket_dir) and hasattr(socket, 'AF_UNIX')
+    
+    def _socket_path(self, pid=None):
+        return os.path.join(self._socket_dir, f'{pid or os.getpid()}.sock')
+    
+    def _broadcast(self, channel):
+        """Send the channel name to every other worker's socket."""
+        if not self._cross_process_enabled():
+            return
+        
+        try:
+            names = os.listdir(self._socket_dir)
+        except FileNotFoundError:
+            return
+        
+        own_path = self._socket_path()
+        payload = channel.encode('utf-8')
+        
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        try:
+            for name in names:
+                path = os.path.join(self._socket_dir, name)
+                if not name.endswith('.sock') or path == own_path:
+                    continue
+                try:
+                    sock.sendto(payload, path)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # Worker has exited; clean up its socket
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+                except OSError:
+                    # Receiver buffer full; its waiters time out and re-poll
+                    pass
+        finally:
+            sock.close()
+    
+    def _ensure_listener(self):
+        """Bind this worker's socket and start its receive thread once."""
+        if not self._cross_process_enabled() or self._listener_pid == os.getpid():
+            return
+        
+        with self._listener_lock:
+            if self._listener_pid == os.getpid():
+                return
+            self._listener_pid = os.getpid()
+            
+            path = self._socket_path()
+            try:
+                os.makedirs(self._socket_dir, exist_ok=True)
+                if os.path.exists(path):
+                    os.unlink(path)
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+                sock.bind(path)
+            except OSError:
+                logger.warning('Notification socket unavailable at %s; '
+                               'only same-process waiters will be woken', path)
+                return
+            
+            thread = threading.Thread(
+                target=self._listen, args=(sock,),
+                name='notification-hub', daemon=True
+            )
+            thread.start()
+    
+    def _listen(self, sock):
+        while True:
+            try:
+                data = sock.recv(256)
+            except OSError:
+                return
+            self._bump(data.decode('utf-8', errors='ignore'))
+
+
+# Shared hub instance, initialized in create_app
+notifier = NotificationHub()
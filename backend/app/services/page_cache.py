@@ -0,0 +1,167 @@
+"""
+Page Cache
+Serves static marketing pages from pre-rendered, precompressed bodies.
+"""
+import gzip
+import hashlib
+import os
+
+from flask import current_app, request, render_template
+from jinja2 import meta
+
+try:
+    import brotli
+except ImportError:
+    # Optional; without it pages are served gzip-compressed or identity
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+
+
+class _CachedPage:
+    """One rendered page with its precomputed representations."""
+    
+    def __init__(self, body, sources):
+        self.sources = sources
+        self.etag = hashlib.sha1(body).hexdigest()[:20]
+        self.bodies = {'identity': body}
+        
+        if len(body) >= MIN_COMPRESS_SIZE:
+            compressed = {'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                compressed['br'] = brotli.compress(body, quality=11)
+            
+            for encoding, data in compressed.items():
+                if len(data) < len(body):
+                    self.bodies[encoding] = data
+
+
+class PageCache:
+    """
+    Renders templates once per process and serves the stored bytes.
+    
+    Entries are keyed by endpoint and template, and are re-rendered when the
+    mtime of the template or of any template it extends, includes or
+    imports changes, so a deploy (or an edit in development) is picked up
+    without restarting. Each page is stored as identity, gzip
+    and, when the brotli package is installed, br bodies, with an ETag per
+    encoding so conditional requests are answered with a 304.
+    
+    Only use it for templates whose output does not depend on the request.
+    """
+    
+    # Preferred first when the client accepts several with equal quality
+    ENCODINGS = ('br', 'gzip')
+    
+    def __init__(self, app=None):
+        self._pages = {}
+        self._enabled = True
+        self._max_age = 300
+        
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        """Read page cache settings from the app config."""
+        self._enabled = app.config.get('PAGE_CACHE_ENABLED', True)
+        self._max_age = app.config.get('PAGE_CACHE_MAX_AGE', 300)
+        app.extensions['page_cache'] = self
+    
+    def clear(self):
+        """Drop every cached page; they are rendered again on next request."""
+        self._pages.clear()
+    
+    def render(self, template_name):
+        """
+        Return the response for a static template, rendering it only if needed.
+        
+        Args:
+            template_name: Template to render (e.g. 'index.html')
+        
+        Returns:
+            Flask response object (200 with a body, or 304)
+        """
+        if not self._enabled:
+            return render_template(template_name)
+        
+        page = self._get(template_name)
+        encoding = self._choose_encoding(page)
+        etag = page.etag if encoding == 'identity' else f'{page.etag}-{encoding}'
+        
+        if request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = current_app.response_class(page.bodies[encoding], mimetype='text/html')
+            if encoding != 'identity':
+                response.headers['Content-Encoding'] = encoding
+        
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = f'public, max-age={self._max_age}'
+        response.vary.add('Accept-Encoding')
+        return response
+    
+    def _get(self, template_name):
+        """Look up the cached page, rendering it if missing or stale."""
+        key = (request.endpoint, template_name)
+        page = self._pages.get(key)
+        
+        if page is not None and all(_mtime(filename) == mtime for filename, mtime in page.sources):
+            return page
+        
+        env = current_app.jinja_env
+        if page is not None and not env.auto_reload:
+            # Jinja only re-reads changed sources itself with auto_reload on
+            env.cache.clear()
+        
+        # Resolve the source files once per render; hits only stat them
+        sources = tuple((filename, _mtime(filename)) for filename in _template_files(env, template_name))
+        body = render_template(template_name).encode('utf-8')
+        
+        page = _CachedPage(body, sources)
+        self._pages[key] = page
+        return page
+    
+    def _choose_encoding(self, page):
+        """Pick the best stored encoding the client accepts."""
+        accepted = request.accept_encodings
+        best, best_quality = 'identity', 0
+        
+        for encoding in self.ENCODINGS:
+            quality = accepted[encoding]
+            if encoding in page.bodies and quality > best_quality:
+                best, best_quality = encoding, quality
+        
+        return best
+
+
+def _template_files(env, template_name, files=None):
+    """
+    Source files of a template and every template it extends, includes or imports.
+    
+    Only names written as string literals can be followed; templates
+    chosen at render time are not tracked.
+    """
+    if files is None:
+        files = {}
+    
+    source, filename, _ = env.loader.get_source(env, template_name)
+    files[template_name] = filename
+    
+    for name in meta.find_referenced_templates(env.parse(source)):
+        if name is not None and name not in files:
+            _template_files(env, name, files)
+    
+    return list(files.values())
+
+
+def _mtime(filename):
+    """Modification time of a template file, or None if it cannot be read."""
+    try:
+        return os.stat(filename).st_mtime_ns
+    except (OSError, TypeError):
+        return None
+
+
+# Shared cache instance, initialized in create_app
+page_cache = PageCache()
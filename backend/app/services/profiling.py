@@ -0,0 +1,212 @@
+"""
+Request Profiling
+Samples per-request timings (SQL, templates, JSON) and flags N+1 query patterns.
+"""
+import logging
+import random
+import threading
+import time
+from collections import Counter
+
+from flask import g, has_app_context, request, before_render_template, template_rendered
+from sqlalchemy import event
+
+from app.extensions import db
+
+logger = logging.getLogger(__name__)
+
+
+class _RequestProfile:
+    """Timings collected for one sampled request."""
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.render_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.statements = Counter()
+        self.render_stack = []
+    
+    def repeated_statements(self, threshold):
+        """Statements run at least threshold times, most frequent first."""
+        return [(sql, count) for sql, count in self.statements.most_common() if count >= threshold]
+
+
+class RequestProfiler:
+    """
+    Samples requests and reports where their time went.
+    
+    A PROFILE_SAMPLE_RATE fraction of requests is profiled: SQL statements
+    and their time are counted from cursor events on every engine, template
+    rendering from Flask's render signals and JSON encoding in the app's
+    JSON provider. Sampled responses get a Server-Timing header (visible in
+    browser dev tools) and feed per-endpoint totals for this worker; a
+    statement repeated PROFILE_N_PLUS_ONE_THRESHOLD times in one request,
+    typically a lazy load such as Ticket.messages in a loop, is logged as
+    a likely N+1. With a rate of 0 no hooks are installed at all.
+    """
+    
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._sample_rate = 0.0
+        self._n_plus_one_threshold = 5
+        self._slow_request_ms = 500
+        
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        """Install request, template, JSON and engine hooks if sampling is on."""
+        self._sample_rate = app.config.get('PROFILE_SAMPLE_RATE', 0.0)
+        self._n_plus_one_threshold = app.config.get('PROFILE_N_PLUS_ONE_THRESHOLD', 5)
+        self._slow_request_ms = app.config.get('PROFILE_SLOW_REQUEST_MS', 500)
+        self._endpoints = {}
+        app.extensions['request_profiler'] = self
+        
+        if self._sample_rate <= 0:
+            return
+        
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        before_render_template.connect(self._render_started, app, weak=False)
+        template_rendered.connect(self._render_finished, app, weak=False)
+        app.json = _timed_json_provider(type(app.json))(app)
+        
+        with app.app_context():
+            engines = list(db.engines.values())
+        
+        for engine in engines:
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    
+    def snapshot(self):
+        """
+        Per-endpoint totals for requests sampled by this worker.
+        
+        Returns:
+            dict: Endpoint -> requests, mean/max time, mean queries and
+                DB time, and N+1 warnings, slowest mean first
+        """
+        with self._lock:
+            items = [(endpoint, dict(totals)) for endpoint, totals in self._endpoints.items()]
+        
+        report = {}
+        for endpoint, totals in sorted(items, key=lambda item: -item[1]['total_ms'] / item[1]['requests']):
+            count = totals['requests']
+            report[endpoint] = {
+                'requests': count,
+                'mean_ms': round(totals['total_ms'] / count, 2),
+                'max_ms': round(totals['max_ms'], 2),
+                'mean_queries': round(totals['queries'] / count, 1),
+                'mean_db_ms': round(totals['db_ms'] / count, 2),
+                'mean_bytes': round(totals['bytes'] / count),
+                'n_plus_one': totals['n_plus_one']
+            }
+        return report
+    
+    def _start(self):
+        if random.random() < self._sample_rate:
+            g.request_profile = _RequestProfile()
+    
+    def _finish(self, response):
+        profile = g.pop('request_profile', None)
+        if profile is None:
+            return response
+        
+        total_ms = (time.perf_counter() - profile.started) * 1000
+        db_ms = profile.db_seconds * 1000
+        render_ms = profile.render_seconds * 1000
+        serialize_ms = profile.serialize_seconds * 1000
+        size = response.calculate_content_length()
+        endpoint = request.endpoint or '<unmatched>'
+        
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={db_ms:.1f};desc="{profile.queries} queries", '
+            f'render;dur={render_ms:.1f}, serialize;dur={serialize_ms:.1f}, '
+            f'app;dur={total_ms:.1f}'
+        )
+        
+        repeated = profile.repeated_statements(self._n_plus_one_threshold)
+        for sql, count in repeated:
+            logger.warning('Possible N+1 in %s: %d x %s', endpoint, count, ' '.join(sql.split())[:300])
+        
+        if total_ms >= self._slow_request_ms:
+            logger.info(
+                'Slow request %s %s: %.1f ms (db %.1f ms / %d queries, render %.1f ms, serialize %.1f ms)',
+                request.method, request.path, total_ms, db_ms, profile.queries, render_ms, serialize_ms
+            )
+        
+        with self._lock:
+            totals = self._endpoints.setdefault(endpoint, {
+                'requests': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'queries': 0,
+                'db_ms': 0.0, 'bytes': 0, 'n_plus_one': 0
+            })
+            totals['requests'] += 1
+            totals['total_ms'] += total_ms
+            totals['max_ms'] = max(totals['max_ms'], total_ms)
+            totals['queries'] += profile.queries
+            totals['db_ms'] += db_ms
+            totals['bytes'] += size or 0
+            totals['n_plus_one'] += bool(repeated)
+        
+        return response
+    
+    @staticmethod
+    def _render_started(sender, template, context, **extra):
+        profile = _current_profile()
+        if profile is not None:
+            profile.render_stack.append(time.perf_counter())
+    
+    @staticmethod
+    def _render_finished(sender, template, context, **extra):
+        profile = _current_profile()
+        if profile is not None and profile.render_stack:
+            started = profile.render_stack.pop()
+            # A render_template call inside a render is part of the outer one
+            if not profile.render_stack:
+                profile.render_seconds += time.perf_counter() - started
+
+
+def _current_profile():
+    return g.get('request_profile') if has_app_context() else None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile() is not None:
+        conn.info.setdefault('profile_query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile()
+    started = conn.info.get('profile_query_started')
+    if profile is None or not started:
+        return
+    
+    profile.db_seconds += time.perf_counter() - started.pop()
+    profile.queries += 1
+    profile.statements[statement] += 1
+
+
+def _timed_json_provider(provider_class):
+    """Subclass a JSON provider so dumps() time is added to the request profile."""
+    
+    class TimedJSONProvider(provider_class):
+        def dumps(self, obj, **kwargs):
+            profile = _current_profile()
+            if profile is None:
+                return super().dumps(obj, **kwargs)
+            
+            started = time.perf_counter()
+            try:
+                return super().dumps(obj, **kwargs)
+            finally:
+                profile.serialize_seconds += time.perf_counter() - started
+    
+    return TimedJSONProvider
+
+
+# Shared profiler instance, initialized in create_app
+request_profiler = RequestProfiler()
@@ -0,0 +1,247 @@
+"""
+Rate Limiting
+Token-bucket throttling of public write endpoints by client IP and ticket.
+"""
+import functools
+import itertools
+import logging
+import math
+import sqlite3
+import threading
+import time
+
+from flask import request
+
+from app.services.local_store import LocalSQLite
+from app.utils import error_response
+
+logger = logging.getLogger(__name__)
+
+# Throttled actions; each reads its 'requests/seconds' limit from
+# RATE_LIMIT_<RULE> in the config
+RATE_LIMIT_RULES = ('quote', 'subscribe', 'lead', 'message', 'ticket_message')
+
+# Atomically take one token, creating the bucket full on first use. No row
+# comes back when the bucket is empty (the UPDATE's WHERE fails).
+SQLITE_TAKE = """
+    INSERT INTO buckets (key, tokens, updated) VALUES (:key, :capacity - 1, :now)
+    ON CONFLICT (key) DO UPDATE SET
+        tokens = min(:capacity, tokens + (:now - updated) * :rate) - 1,
+        updated = :now
+    WHERE min(:capacity, tokens + (:now - updated) * :rate) >= 1
+    RETURNING tokens
+"""
+
+
+def parse_limit(value):
+    """
+    Parse a 'requests/seconds' limit.
+    
+    Args:
+        value: Limit string, e.g. '5/600'
+    
+    Returns:
+        tuple: (capacity, refill rate in tokens per second)
+    
+    Raises:
+        ValueError: If the value is malformed or not positive
+    """
+    try:
+        count, seconds = (float(part) for part in value.split('/'))
+    except (AttributeError, ValueError) as e:
+        raise ValueError(f'Invalid rate limit {value!r}; use requests/seconds') from e
+    
+    if count < 1 or seconds <= 0:
+        raise ValueError(f'Invalid rate limit {value!r}; use requests/seconds')
+    
+    return count, count / seconds
+
+
+class MemoryBuckets:
+    """
+    Token buckets in this worker's memory.
+    
+    Each gunicorn worker counts separately, so a client spread across N
+    workers gets up to N times the limit. Buckets are kept in least
+    recently used order; past max_keys, refilled buckets are dropped
+    (they are the same as no bucket) and then the least recently used.
+    """
+    
+    def __init__(self, max_keys=10000):
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._max_keys = max_keys
+    
+    def take(self, key, capacity, rate):
+        """Take a token; return 0 if allowed, else seconds until one is available."""
+        now = time.monotonic()
+        
+        with self._lock:
+            tokens, updated, _ = self._buckets.pop(key, (capacity, now, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+            if len(self._buckets) > self._max_keys:
+                self._prune(now)
+        
+        return 0 if allowed else (1 - tokens) / rate
+    
+    def _prune(self, now):
+        buckets = {key: bucket for key, bucket in self._buckets.items() if bucket[2] > now}
+        
+        overflow = len(buckets) - self._max_keys // 2
+        for key in list(buckets)[:max(overflow, 0)]:
+            del buckets[key]
+        
+        self._buckets = buckets
+
+
+class SQLiteBuckets:
+    """
+    Token buckets in a LocalSQLite file shared by all workers on the host.
+    
+    Each take is one UPSERT ... RETURNING, so it stays in the tens of
+    microseconds; losing the file only resets limits. Every PRUNE_EVERY
+    takes, buckets idle for longer than retention seconds (by then they
+    have refilled) are deleted.
+    """
+    
+    PRUNE_EVERY = 1000
+    
+    def __init__(self, path, retention):
+        self._store = LocalSQLite(path, (
+            'CREATE TABLE IF NOT EXISTS buckets '
+            '(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL) WITHOUT ROWID',
+        ))
+        self._retention = retention
+        self._takes = itertools.count(1)
+    
+    def take(self, key, capacity, rate):
+        """Take a token; return 0 if allowed, else seconds until one is available."""
+        now = time.time()
+        connection = self._store.connection()
+        params = {'key': key, 'capacity': capacity, 'rate': rate, 'now': now}
+        
+        if next(self._takes) % self.PRUNE_EVERY == 0:
+            connection.execute('DELETE FROM buckets WHERE updated < ?', (now - self._retention,))
+        
+        if connection.execute(SQLITE_TAKE, params).fetchone() is not None:
+            return 0
+        
+        row = connection.execute(
+            'SELECT min(:capacity, tokens + (:now - updated) * :rate) FROM buckets WHERE key = :key',
+            params
+        ).fetchone()
+        return (1 - row[0]) / rate if row else 0
+
+
+class RateLimiter:
+    """
+    Throttles view functions with per-client token buckets.
+    
+    Views opt in with @rate_limiter.limit(rule), which keys the bucket by
+    client IP, or limit(rule, key=...) to key it by a view argument such as
+    the ticket id. Over-limit requests get 429 with Retry-After before the
+    view parses or writes anything. RATE_LIMIT_BACKEND 'memory' keeps
+    buckets per worker; 'sqlite' shares them between workers through
+    RATE_LIMIT_DB. If the shared store fails the request is allowed.
+    
+    Behind a reverse proxy, set RATE_LIMIT_TRUSTED_PROXIES to the number
+    of proxies that append to X-Forwarded-For, or every client shares the
+    proxy's address.
+    """
+    
+    def __init__(self, app=None):
+        self._enabled = False
+        self._limits = {}
+        self._buckets = None
+        self._trusted_proxies = 0
+        
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        """Read limits and choose the bucket backend from the app config."""
+        self._enabled = app.config.get('RATE_LIMIT_ENABLED', True)
+        self._trusted_proxies = app.config.get('RATE_LIMIT_TRUSTED_PROXIES', 0)
+        self._limits = {rule: parse_limit(app.config[f'RATE_LIMIT_{rule.upper()}']) for rule in RATE_LIMIT_RULES}
+        
+        backend = app.config.get('RATE_LIMIT_BACKEND', 'memory')
+        if backend == 'sqlite':
+            # Keep buckets until the slowest one could have refilled
+            retention = max(capacity / rate for capacity, rate in self._limits.values())
+            self._buckets = SQLiteBuckets(app.config['RATE_LIMIT_DB'], retention)
+        elif backend == 'memory':
+            self._buckets = MemoryBuckets()
+        else:
+            raise ValueError(f"Unknown RATE_LIMIT_BACKEND {backend!r}; use 'memory' or 'sqlite'")
+        
+        app.extensions['rate_limiter'] = self
+    
+    def limit(self, rule, key=None):
+        """
+        Decorator that rejects requests once a bucket is empty.
+        
+        Args:
+            rule: Name in RATE_LIMIT_RULES
+            key: Optional function of the view's keyword arguments returning
+                the bucket key; defaults to the client IP
+        
+        Returns:
+            Decorator for a view function
+        """
+        if rule not in RATE_LIMIT_RULES:
+            raise ValueError(f'Unknown rate limit rule {rule!r}')
+        
+        def decorator(f):
+            @functools.wraps(f)
+            def decorated_function(*args, **kwargs):
+                if self._enabled:
+                    subject = key(**kwargs) if key else self.client_ip()
+                    retry_after = self.hit(rule, subject)
+                    if retry_after:
+                        return _too_many_requests(retry_after)
+                return f(*args, **kwargs)
+            return decorated_function
+        return decorator
+    
+    def hit(self, rule, subject):
+        """
+        Take one token from the rule's bucket for a subject.
+        
+        Args:
+            rule: Name in RATE_LIMIT_RULES
+            subject: Client IP, ticket id, ...
+        
+        Returns:
+            float: 0 if allowed, else seconds until a request is allowed again
+        """
+        capacity, rate = self._limits[rule]
+        
+        try:
+            return self._buckets.take(f'{rule}:{subject}', capacity, rate)
+        except sqlite3.Error:
+            logger.exception('Rate limit store failed; allowing request')
+            return 0
+    
+    def client_ip(self):
+        """The client address, skipping RATE_LIMIT_TRUSTED_PROXIES forwarding hops."""
+        if self._trusted_proxies:
+            forwarded = request.headers.get('X-Forwarded-For', '')
+            hops = [hop.strip() for hop in forwarded.split(',') if hop.strip()]
+            if len(hops) >= self._trusted_proxies:
+                return hops[-self._trusted_proxies]
+        return request.remote_addr or 'unknown'
+
+
+def _too_many_requests(retry_after):
+    response = error_response('Too many requests. Please try again later.', 429)
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+# Shared limiter instance, initialized in create_app
+rate_limiter = RateLimiter()
@@ -0,0 +1,52 @@
+"""
+Schema Upgrades
+In-place changes to existing tables that db.create_all cannot make.
+"""
+from sqlalchemy import MetaData, inspect, select, text
+from sqlalchemy.schema import CreateTable
+
+from app.extensions import db
+from app.models import Ticket
+
+
+def enable_ticket_autoincrement():
+    """
+    Rebuild an SQLite tickets table created without AUTOINCREMENT.
+    
+    Without it SQLite hands the id of the newest ticket to the next one
+    once that ticket is deleted, and with it the same ticket ID. SQLite
+    cannot add AUTOINCREMENT to a table, so the rows are copied into a
+    new one that replaces it. Ids are kept, so messages and the search
+    index still line up; the search triggers on tickets are dropped with
+    the old table and recreated by build_search_index.
+    
+    Returns:
+        bool: True if the table was rebuilt
+    """
+    if db.engine.dialect.name != 'sqlite':
+        return False
+    
+    table = Ticket.__table__
+    ddl = db.session.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {'name': table.name}
+    ).scalar()
+    if ddl is None or 'AUTOINCREMENT' in ddl.upper():
+        return False
+    
+    existing = {column['name'] for column in inspect(db.engine).get_columns(table.name)}
+    columns = [column.name for column in table.columns if column.name in existing]
+    staging = table.to_metadata(MetaData(), name=f'{table.name}_rebuild')
+    
+    db.session.execute(CreateTable(staging))
+    db.session.execute(
+        staging.insert().from_select(columns, select(*(table.c[name] for name in columns)))
+    )
+    db.session.execute(text(f'DROP TABLE {table.name}'))
+    db.session.execute(text(f'ALTER TABLE {staging.name} RENAME TO {table.name}'))
+    db.session.commit()
+    
+    for index in table.indexes:
+        index.create(db.engine, checkfirst=True)
+    
+    return True
@@ -0,0 +1,297 @@
+"""
+Ticket Search
+Ranked full-text search over tickets and their messages.
+"""
+import logging
+import re
+
+from flask import current_app
+from sqlalchemy import DDL, Float, Integer, event, func, or_, select, text
+
+from app.extensions import db
+from app.models import Ticket, Message
+
+logger = logging.getLogger(__name__)
+
+# FTS5 indexes over the tickets and messages tables (external content, so
+# the text is not stored twice) and the triggers that keep them in sync
+TICKETS_FTS_DDL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS tickets_fts USING fts5(
+        name, email, project_type, message,
+        content='tickets', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tickets_fts_insert AFTER INSERT ON tickets BEGIN
+        INSERT INTO tickets_fts (rowid, name, email, project_type, message)
+        VALUES (new.id, new.name, new.email, new.project_type, new.message);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tickets_fts_delete AFTER DELETE ON tickets BEGIN
+        INSERT INTO tickets_fts (tickets_fts, rowid, name, email, project_type, message)
+        VALUES ('delete', old.id, old.name, old.email, old.project_type, old.message);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tickets_fts_update
+    AFTER UPDATE OF name, email, project_type, message ON tickets BEGIN
+        INSERT INTO tickets_fts (tickets_fts, rowid, name, email, project_type, message)
+        VALUES ('delete', old.id, old.name, old.email, old.project_type, old.message);
+        INSERT INTO tickets_fts (rowid, name, email, project_type, message)
+        VALUES (new.id, new.name, new.email, new.project_type, new.message);
+    END
+    """
+)
+
+MESSAGES_FTS_DDL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+        message,
+        content='messages', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+        INSERT INTO messages_fts (rowid, message) VALUES (new.id, new.message);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+        INSERT INTO messages_fts (messages_fts, rowid, message) VALUES ('delete', old.id, old.message);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF message ON messages BEGIN
+        INSERT INTO messages_fts (messages_fts, rowid, message) VALUES ('delete', old.id, old.message);
+        INSERT INTO messages_fts (rowid, message) VALUES (new.id, new.message);
+    END
+    """
+)
+
+# Newest ticket and message matches, of tickets with the requested status
+# (any when :status is NULL). FTS5 walks a match in rowid order and stops
+# at the limit, so common terms cost about as much as rare ones; the status
+# is checked per hit by primary key, so filtering happens before the limit
+# and older statuses are not crowded out by newer tickets.
+# Ticket hits carry a bm25 score (lower is better; name and email outrank
+# body text). Message hits carry their id instead: bm25 needs a pass over
+# every row containing each term, which is too slow on a large messages
+# table, so conversations rank by recency.
+FTS_MATCHES = """
+    SELECT ticket_pk, score, NULL AS message_pk FROM (
+        SELECT tickets_fts.rowid AS ticket_pk, bm25(tickets_fts, 10.0, 10.0, 2.0, 1.0) AS score
+        FROM tickets_fts
+        JOIN tickets ON tickets.id = tickets_fts.rowid
+        WHERE tickets_fts MATCH :match AND (:status IS NULL OR tickets.status = :status)
+        ORDER BY tickets_fts.rowid DESC LIMIT :candidates
+    )
+    UNION ALL
+    SELECT ticket_pk, NULL, message_pk FROM (
+        SELECT messages.ticket_id AS ticket_pk, messages_fts.rowid AS message_pk
+        FROM messages_fts
+        JOIN messages ON messages.id = messages_fts.rowid
+        JOIN tickets ON tickets.id = messages.ticket_id
+        WHERE messages_fts MATCH :match AND (:status IS NULL OR tickets.status = :status)
+        ORDER BY messages_fts.rowid DESC LIMIT :candidates
+    )
+"""
+
+# New databases get the index with the tables (create_all / init-db)
+for _table, _statements in ((Ticket.__table__, TICKETS_FTS_DDL), (Message.__table__, MESSAGES_FTS_DDL)):
+    for _statement in _statements:
+        event.listen(_table, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+
+
+class SearchPage:
+    """
+    One page of ranked search results.
+    
+    Attributes:
+        items: Tickets on this page, best match first
+        page: 1-based page number
+        has_prev: Whether an earlier page exists
+        has_next: Whether a later page exists
+    """
+    
+    def __init__(self, items, page, has_next):
+        self.items = items
+        self.page = page
+        self.has_prev = page > 1
+        self.has_next = has_next
+
+
+class TicketSearch:
+    """
+    Searches tickets by customer details, request text and conversation.
+    
+    On SQLite the FTS5 indexes above are queried (words are stemmed, so
+    'refunds' finds 'refund'). A ticket matches if all terms occur in its
+    own fields or all occur in one of its messages. Among the newest
+    SEARCH_CANDIDATES matches per index (with the status filter applied
+    before that cut), tickets whose own fields match
+    come first by bm25, then tickets matched through their conversation,
+    most recent message first. Other databases, or a SQLite database whose
+    index has not been built yet, fall back to case-insensitive LIKE
+    filters with newest tickets first.
+    """
+    
+    def __init__(self, app=None):
+        self._fts_ready = False
+        self._warned = False
+        
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        """Forget index state from a previous app."""
+        self._fts_ready = False
+        self._warned = False
+        app.extensions['ticket_search'] = self
+    
+    def search(self, query, status=None, page=1, per_page=20):
+        """
+        Find tickets matching a free-text query.
+        
+        Args:
+            query: Search text; quotes and FTS operators are matched
+                literally, not interpreted
+            status: Optional status filter
+            page: 1-based page number
+            per_page: Results per page
+        
+        Returns:
+            SearchPage: Ranked results (empty for a blank query)
+        """
+        terms = _parse_terms(query)
+        page = max(page, 1)
+        
+        if not terms:
+            return SearchPage([], page, False)
+        
+        if self._fts_available():
+            statement = _fts_statement(terms, current_app.config.get('SEARCH_CANDIDATES', 1000), status)
+        else:
+            statement = _like_statement(terms)
+            if status:
+                statement = statement.where(Ticket.status == status)
+        
+        tickets = db.session.scalars(
+            statement.limit(per_page + 1).offset((page - 1) * per_page)
+        ).all()
+        
+        return SearchPage(tickets[:per_page], page, len(tickets) > per_page)
+    
+    def _fts_available(self):
+        if self._fts_ready:
+            return True
+        
+        if db.engine.dialect.name != 'sqlite':
+            return False
+        
+        found = db.session.execute(text(
+            "SELECT count(*) FROM sqlite_master WHERE type = 'table' "
+            "AND name IN ('tickets_fts', 'messages_fts')"
+        )).scalar()
+        
+        self._fts_ready = found == 2
+        if not self._fts_ready and not self._warned:
+            self._warned = True
+            logger.warning('Search index missing; run `flask search-index`. Using LIKE search.')
+        
+        return self._fts_ready
+
+
+def build_search_index(rebuild=False):
+    """
+    Create the FTS5 search index and triggers on an existing database.
+    
+    Args:
+        rebuild: Re-read all tickets and messages even if the index exists
+    
+    Returns:
+        bool: True if the index was (re)built, False if not SQLite or
+            already present
+    """
+    if db.engine.dialect.name != 'sqlite':
+        return False
+    
+    existing = set(db.session.execute(text(
+        "SELECT name FROM sqlite_master WHERE name IN ('tickets_fts', 'messages_fts')"
+    )).scalars())
+    
+    built = False
+    for name, statements in (('tickets_fts', TICKETS_FTS_DDL), ('messages_fts', MESSAGES_FTS_DDL)):
+        for statement in statements:
+            db.session.execute(text(statement))
+        
+        if rebuild or name not in existing:
+            db.session.execute(text(f"INSERT INTO {name} ({name}) VALUES ('rebuild')"))
+            built = True
+    
+    db.session.commit()
+    return built
+
+
+def _parse_terms(query):
+    """Split a query on whitespace into word lists, dropping punctuation-only terms."""
+    terms = []
+    for token in (query or '').split():
+        words = re.findall(r'\w+', token)
+        if words:
+            terms.append((token, words))
+    return terms
+
+
+def _fts_statement(terms, candidates, status=None):
+    # Each whitespace-separated term becomes a quoted phrase, so
+    # jane@example.com matches the tokens "jane example com" in order
+    match = ' '.join(f'"{" ".join(words)}"' for _, words in terms)
+    
+    matches = text(FTS_MATCHES).bindparams(match=match, candidates=candidates, status=status or None)
+    matches = matches.columns(ticket_pk=Integer, score=Float, message_pk=Integer).subquery('matches')
+    
+    best = (
+        select(
+            matches.c.ticket_pk,
+            func.min(matches.c.score).label('score'),
+            func.max(matches.c.message_pk).label('message_pk')
+        )
+        .group_by(matches.c.ticket_pk)
+        .subquery('best')
+    )
+    
+    return (
+        select(Ticket)
+        .join(best, Ticket.id == best.c.ticket_pk)
+        .order_by(
+            best.c.score.is_(None),
+            best.c.score,
+            best.c.message_pk.desc(),
+            Ticket.id.desc()
+        )
+    )
+
+
+def _like_statement(terms):
+    statement = select(Ticket)
+    
+    for token, _ in terms:
+        statement = statement.where(or_(
+            Ticket.name.icontains(token, autoescape=True),
+            Ticket.email.icontains(token, autoescape=True),
+            Ticket.project_type.icontains(token, autoescape=True),
+            Ticket.message.icontains(token, autoescape=True),
+            Ticket.id.in_(
+                select(Message.ticket_id).where(Message.message.icontains(token, autoescape=True))
+            )
+        ))
+    
+    return statement.order_by(Ticket.created_at.desc(), Ticket.id.desc())
+
+
+# Shared search instance, initialized in create_app
+ticket_search = TicketSearch()
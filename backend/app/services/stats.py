@@ -0,0 +1,83 @@
+"""
+Dashboard Statistics Service
+Computes and caches the aggregate counts shown on the admin dashboard.
+"""
+import threading
+import time
+
+from flask import current_app
+
+from app.extensions import db
+from app.models import Ticket, Lead, Subscriber
+from app.services.notifications import notifier
+
+# Notification channel bumped whenever a write changes a dashboard count
+STATS_CHANNEL = 'stats:dashboard'
+
+_lock = threading.Lock()
+_cached = None
+_cached_version = None
+_expires_at = 0.0
+
+
+def get_dashboard_stats():
+    """
+    Return dashboard counts, recomputing them at most once per TTL.
+    
+    The cache is per worker process. Writes call invalidate_dashboard_stats,
+    which bumps a notification channel that every worker checks, so counts
+    refresh immediately after a change rather than waiting out the TTL.
+    
+    Returns:
+        dict: {
+            'tickets': {'total': int, 'by_status': {status: int}},
+            'leads': int,
+            'subscribers': int
+        }
+    """
+    global _cached, _cached_version, _expires_at
+    
+    version = notifier.version(STATS_CHANNEL)
+    now = time.monotonic()
+    
+    with _lock:
+        if _cached is not None and _cached_version == version and now < _expires_at:
+            return _cached
+    
+    stats = _compute_stats()
+    
+    with _lock:
+        _cached = stats
+        _cached_version = version
+        _expires_at = now + current_app.config['DASHBOARD_STATS_TTL']
+    
+    return stats
+
+
+def invalidate_dashboard_stats():
+    """Drop cached dashboard counts in every worker after a write."""
+    notifier.publish(STATS_CHANNEL)
+
+
+def _compute_stats():
+    """Run the aggregate queries: one GROUP BY for tickets, one for the rest."""
+    by_status = dict.fromkeys(Ticket.VALID_STATUSES, 0)
+    rows = db.session.query(Ticket.status, db.func.count(Ticket.id)).group_by(Ticket.status)
+    for status, count in rows:
+        by_status[status] = count
+    
+    total_leads, total_subscribers = db.session.query(
+        db.select(db.func.count(Lead.id)).scalar_subquery(),
+        db.select(db.func.count(Subscriber.id)).where(
+            Subscriber.is_active.is_(True)
+        ).scalar_subquery()
+    ).one()
+    
+    return {
+        'tickets': {
+            'total': sum(by_status.values()),
+            'by_status': by_status
+        },
+        'leads': total_leads,
+        'subscribers': total_subscribers
+    }
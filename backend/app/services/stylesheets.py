@@ -0,0 +1,379 @@
+"""
+Site Stylesheet
+Builds the purged Tailwind stylesheet and self-hosted font subsets.
+"""
+import glob
+import hashlib
+import io
+import json
+import os
+import re
+import subprocess
+import tempfile
+import urllib.request
+import zipfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Tailwind inputs, shared with the CDN fallback in templates/_styles.html
+TAILWIND_CONFIG = os.path.join(BACKEND_DIR, 'tailwind.config.js')
+TAILWIND_INPUT = os.path.join(BACKEND_DIR, 'tailwind.input.css')
+TAILWIND_THEME = os.path.join(BACKEND_DIR, 'tailwind.theme.json')
+
+# Outputs, relative to the static folder
+SITE_CSS = 'css/site.css'
+FONTS_DIR = 'fonts'
+
+# OFL font files in backend/fonts (fetched by `flask fetch-fonts`); a
+# variable font is instanced at the face's weight before subsetting
+FONT_SOURCE_DIR = os.path.join(BACKEND_DIR, 'fonts')
+FONT_FACES = (
+    ('Inter', 300, 'Inter-Light.ttf'),
+    ('Inter', 400, 'Inter-Regular.ttf'),
+    ('Inter', 500, 'Inter-Medium.ttf'),
+    ('Inter', 600, 'Inter-SemiBold.ttf'),
+    ('Inter', 700, 'Inter-Bold.ttf'),
+    ('JetBrains Mono', 400, 'JetBrainsMono-Regular.ttf'),
+    ('JetBrains Mono', 700, 'JetBrainsMono-Bold.ttf'),
+    ('Nunito', 700, 'Nunito[wght].ttf'),
+    ('Nunito', 800, 'Nunito[wght].ttf'),
+)
+
+# Where FONT_FACES files come from: a release archive (files picked out by
+# name wherever they sit in it) or a single font file
+FONT_DOWNLOADS = (
+    ('https://github.com/rsms/inter/releases/download/v4.0/Inter-4.0.zip', (
+        'Inter-Light.ttf', 'Inter-Regular.ttf', 'Inter-Medium.ttf', 'Inter-SemiBold.ttf', 'Inter-Bold.ttf',
+    )),
+    ('https://github.com/JetBrains/JetBrainsMono/releases/download/v2.304/JetBrainsMono-2.304.zip', (
+        'JetBrainsMono-Regular.ttf', 'JetBrainsMono-Bold.ttf',
+    )),
+    ('https://raw.githubusercontent.com/google/fonts/main/ofl/nunito/Nunito%5Bwght%5D.ttf', (
+        'Nunito[wght].ttf',
+    )),
+)
+
+# The Tailwind standalone CLI that the Docker build runs for build-css
+TAILWIND_DOWNLOAD = 'https://github.com/tailwindlabs/tailwindcss/releases/download/v3.4.17/tailwindcss-linux-x64'
+
+# Immutable URL and sha256 of each download above, by the URL it is listed
+# under. `flask pin-downloads` writes it on a trusted machine and it is
+# committed; a download that is not pinned or does not match is refused
+DOWNLOADS_LOCK = os.path.join(BACKEND_DIR, 'downloads.lock.json')
+
+# raw.githubusercontent.com URL on a branch or tag, pinned to its commit
+RAW_GITHUB_URL = re.compile(r'https://raw\.githubusercontent\.com/([^/]+)/([^/]+)/([^/]+)/(.+)')
+COMMIT_SHA = re.compile(r'[0-9a-f]{40}')
+
+# Always kept in subsets: Basic Latin, Latin-1 and general punctuation, so
+# names and messages typed by visitors still render in the site fonts
+BASE_UNICODE_RANGES = ((0x20, 0x7E), (0xA0, 0xFF), (0x2000, 0x206F), (0x20AC, 0x20AC))
+
+
+class SiteStylesheet:
+    """
+    Chooses between the compiled stylesheet and the Tailwind CDN.
+    
+    templates/_styles.html links css/site.css when it has been built by
+    `flask build-css` and COMPILED_CSS is on, and otherwise loads the
+    Tailwind CDN with the same theme, so pages render either way. Google
+    Fonts are only requested when no self-hosted subsets exist.
+    """
+    
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        """Expose the stylesheet mode and theme to templates."""
+        compiled = (
+            app.config.get('COMPILED_CSS', True)
+            and os.path.isfile(os.path.join(app.static_folder, SITE_CSS))
+        )
+        self_hosted_fonts = compiled and bool(
+            glob.glob(os.path.join(app.static_folder, FONTS_DIR, '*.woff2'))
+        )
+        
+        with open(TAILWIND_THEME, encoding='utf-8') as f:
+            theme = json.load(f)
+        
+        app.jinja_env.globals.update(
+            compiled_css=compiled,
+            self_hosted_fonts=self_hosted_fonts,
+            tailwind_theme=theme
+        )
+        app.extensions['site_stylesheet'] = self
+
+
+def build_css(static_folder, tailwind_bin='tailwindcss'):
+    """
+    Compile the purged, minified Tailwind stylesheet with @font-face rules.
+    
+    Tailwind scans the templates and script.js (see tailwind.config.js), so
+    only classes that are actually used end up in the output.
+    
+    Args:
+        static_folder: App static folder
+        tailwind_bin: Tailwind standalone CLI executable
+    
+    Returns:
+        tuple: (stylesheet size in bytes, number of font files written)
+    
+    Raises:
+        RuntimeError: If font sources are missing, or the Tailwind CLI is
+            missing or fails
+    """
+    font_css, font_count = build_fonts(static_folder)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, 'tailwind.css')
+        try:
+            result = subprocess.run(
+                [tailwind_bin, '-c', TAILWIND_CONFIG, '-i', TAILWIND_INPUT, '-o', output, '--minify'],
+                cwd=BACKEND_DIR,
+                capture_output=True,
+                text=True
+            )
+        except FileNotFoundError:
+            raise RuntimeError(
+                f'Tailwind CLI not found ({tailwind_bin}); install it with '
+                '`flask fetch-tailwind PATH` and set TAILWIND_BIN'
+            )
+        
+        if result.returncode != 0:
+            raise RuntimeError(f'Tailwind failed:\n{result.stderr[-2000:]}')
+        
+        with open(output, encoding='utf-8') as f:
+            css = font_css + f.read()
+    
+    path = os.path.join(static_folder, SITE_CSS)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(css)
+    
+    return len(css.encode('utf-8')), font_count
+
+
+def build_fonts(static_folder):
+    """
+    Subset the font sources in backend/fonts to WOFF2 files.
+    
+    Each subset keeps BASE_UNICODE_RANGES plus every character used in the
+    templates and script.js. Every face in FONT_FACES must have its source
+    file: pages only stop requesting Google Fonts once subsets exist, so a
+    partial set would silently leave them on a third-party font host.
+    
+    Args:
+        static_folder: App static folder
+    
+    Returns:
+        tuple: (@font-face CSS, number of font files written)
+    
+    Raises:
+        RuntimeError: If font sources are missing, or fontTools (with
+            brotli for WOFF2) is not installed
+    """
+    missing = sorted({
+        filename for _, _, filename in FONT_FACES
+        if not os.path.isfile(os.path.join(FONT_SOURCE_DIR, filename))
+    })
+    if missing:
+        raise RuntimeError(
+            f'Missing font sources in {FONT_SOURCE_DIR}: {", ".join(missing)}; '
+            'run `flask fetch-fonts`'
+        )
+    
+    try:
+        from fontTools import subset
+        from fontTools.varLib import instancer
+        import brotli  # noqa: F401 (needed by fontTools for WOFF2)
+    except ImportError:
+        raise RuntimeError('fontTools and Brotli are required to subset fonts: pip install fonttools brotli')
+    
+    unicodes = _used_codepoints(static_folder)
+    fonts_folder = os.path.join(static_folder, FONTS_DIR)
+    os.makedirs(fonts_folder, exist_ok=True)
+    
+    options = subset.Options()
+    options.flavor = 'woff2'
+    options.layout_features = ['*']
+    
+    rules = []
+    for family, weight, filename in FONT_FACES:
+        font = subset.load_font(os.path.join(FONT_SOURCE_DIR, filename), options)
+        if 'fvar' in font:
+            font = instancer.instantiateVariableFont(font, {'wght': weight}, static=True)
+        
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(unicodes=unicodes)
+        subsetter.subset(font)
+        
+        filename = f'{family.lower().replace(" ", "-")}-{weight}.woff2'
+        subset.save_font(font, os.path.join(fonts_folder, filename), options)
+        
+        rules.append(
+            f'@font-face{{font-family:"{family}";font-style:normal;font-weight:{weight};'
+            f'font-display:swap;src:url(/static/{FONTS_DIR}/{filename}) format("woff2")}}'
+        )
+    
+    return ''.join(rules), len(rules)
+
+
+def fetch_fonts():
+    """
+    Download the FONT_FACES source files into backend/fonts.
+    
+    Files that are already present are not downloaded again; the others
+    are checked against DOWNLOADS_LOCK.
+    
+    Returns:
+        list: Names of the files written
+    
+    Raises:
+        RuntimeError: If a download is not pinned, fails, does not match its
+            sha256 or lacks an expected file
+    """
+    os.makedirs(FONT_SOURCE_DIR, exist_ok=True)
+    written = []
+    
+    for url, filenames in FONT_DOWNLOADS:
+        wanted = {
+            name for name in filenames
+            if not os.path.isfile(os.path.join(FONT_SOURCE_DIR, name))
+        }
+        if not wanted:
+            continue
+        
+        data = download_pinned(url)
+        
+        if url.endswith('.zip'):
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                files = {
+                    os.path.basename(member): archive.read(member)
+                    for member in archive.namelist()
+                    if os.path.basename(member) in wanted
+                }
+        else:
+            files = {filenames[0]: data}
+        
+        if set(files) != wanted:
+            raise RuntimeError(f'{url} is missing {", ".join(sorted(wanted - set(files)))}')
+        
+        for name, content in files.items():
+            with open(os.path.join(FONT_SOURCE_DIR, name), 'wb') as f:
+                f.write(content)
+            written.append(name)
+    
+    return sorted(written)
+
+
+def fetch_tailwind(path):
+    """
+    Install the pinned Tailwind standalone CLI as an executable at path.
+    
+    Raises:
+        RuntimeError: If the download is not pinned, fails or does not
+            match its sha256
+    """
+    data = download_pinned(TAILWIND_DOWNLOAD)
+    
+    with open(path, 'wb') as f:
+        f.write(data)
+    os.chmod(path, 0o755)
+
+
+def pin_downloads():
+    """
+    Write DOWNLOADS_LOCK from the current Tailwind and font downloads.
+    
+    Branch URLs on raw.githubusercontent.com are pinned to the branch's
+    current commit. Run it on a trusted network and review the diff.
+    
+    Returns:
+        dict: The lock, {listed URL: {'url': ..., 'sha256': ...}}
+    
+    Raises:
+        RuntimeError: If a download fails
+    """
+    lock = {}
+    for source in (TAILWIND_DOWNLOAD,) + tuple(url for url, _ in FONT_DOWNLOADS):
+        url = _commit_url(source)
+        lock[source] = {'url': url, 'sha256': hashlib.sha256(_download(url)).hexdigest()}
+    
+    with open(DOWNLOADS_LOCK, 'w', encoding='utf-8') as f:
+        json.dump(lock, f, indent=2, sort_keys=True)
+        f.write('\n')
+    
+    return lock
+
+
+def download_pinned(source):
+    """
+    Download a listed URL from its DOWNLOADS_LOCK pin.
+    
+    Args:
+        source: URL as listed in TAILWIND_DOWNLOAD or FONT_DOWNLOADS
+    
+    Returns:
+        bytes: The verified content
+    
+    Raises:
+        RuntimeError: If the URL is not pinned, the download fails or its
+            sha256 does not match
+    """
+    try:
+        with open(DOWNLOADS_LOCK, encoding='utf-8') as f:
+            pin = json.load(f).get(source)
+    except FileNotFoundError:
+        pin = None
+    
+    if pin is None:
+        raise RuntimeError(
+            f'{source} is not pinned in {os.path.basename(DOWNLOADS_LOCK)}; '
+            'run `flask pin-downloads` and commit the file'
+        )
+    
+    data = _download(pin['url'])
+    digest = hashlib.sha256(data).hexdigest()
+    if digest != pin['sha256']:
+        raise RuntimeError(f'Checksum mismatch for {pin["url"]}: expected {pin["sha256"]}, got {digest}')
+    
+    return data
+
+
+def _download(url):
+    try:
+        with urllib.request.urlopen(url, timeout=60) as response:
+            return response.read()
+    except OSError as e:
+        raise RuntimeError(f'Could not download {url}: {e}')
+
+
+def _commit_url(url):
+    """The URL with a raw.githubusercontent.com branch replaced by its commit."""
+    match = RAW_GITHUB_URL.fullmatch(url)
+    if match is None or COMMIT_SHA.fullmatch(match.group(3)):
+        return url
+    
+    owner, repo, ref, path = match.groups()
+    commit = json.loads(_download(f'https://api.github.com/repos/{owner}/{repo}/commits/{ref}'))['sha']
+    return f'https://raw.githubusercontent.com/{owner}/{repo}/{commit}/{path}'
+
+
+def _used_codepoints(static_folder):
+    """Code points in BASE_UNICODE_RANGES or in the templates and scripts."""
+    codepoints = set()
+    for start, end in BASE_UNICODE_RANGES:
+        codepoints.update(range(start, end + 1))
+    
+    templates = os.path.join(os.path.dirname(static_folder), 'templates', '**', '*.html')
+    scripts = os.path.join(static_folder, 'js', '**', '*.js')
+    
+    for path in glob.glob(templates, recursive=True) + glob.glob(scripts, recursive=True):
+        with open(path, encoding='utf-8') as f:
+            codepoints.update(ord(char) for char in f.read() if ord(char) > 0x7E)
+    
+    return sorted(codepoints)
+
+
+# Shared stylesheet instance, initialized in create_app
+site_stylesheet = SiteStylesheet()
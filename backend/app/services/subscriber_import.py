@@ -0,0 +1,158 @@
+"""
+Subscriber Import
+Bulk-loads newsletter subscribers from CSV or JSON with chunked upserts.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from app.extensions import db
+from app.models import Subscriber
+from app.utils import validate_email
+
+# Dialects whose INSERT supports ON CONFLICT ... DO UPDATE
+ON_CONFLICT_INSERTS = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert
+}
+
+# Dialects whose INSERT supports ON DUPLICATE KEY UPDATE
+ON_DUPLICATE_KEY_INSERTS = {
+    'mysql': mysql.insert,
+    'mariadb': mysql.insert
+}
+
+
+def read_emails(data):
+    """
+    Read raw email values from an uploaded CSV or JSON file.
+    
+    JSON must be an array of strings or of objects with an 'email' key.
+    CSV uses the 'email' column if the first row has one, otherwise the
+    first column of every row.
+    
+    Args:
+        data: Uploaded file contents (bytes)
+    
+    Returns:
+        list: Email values as given (not yet validated)
+    
+    Raises:
+        ValueError: If the file cannot be parsed
+    """
+    try:
+        text = data.decode('utf-8-sig')
+    except UnicodeDecodeError as e:
+        raise ValueError('File must be UTF-8 encoded') from e
+    
+    if text.lstrip().startswith('['):
+        try:
+            items = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f'Invalid JSON: {e}') from e
+        return [item.get('email') if isinstance(item, dict) else item for item in items]
+    
+    rows = csv.reader(io.StringIO(text))
+    header = next(rows, [])
+    normalized = [cell.strip().lower() for cell in header]
+    
+    if 'email' in normalized:
+        column = normalized.index('email')
+        records = rows
+    else:
+        column = 0
+        records = [header, *rows]
+    
+    return [row[column] if len(row) > column else None for row in records]
+
+
+def import_subscribers(emails, chunk_size=500):
+    """
+    Subscribe a batch of emails, reactivating unsubscribed ones.
+    
+    Emails are validated and de-duplicated up front, then written
+    chunk_size at a time, one transaction per chunk. Each chunk is one
+    SELECT to classify the emails plus one upsert (INSERT ... ON CONFLICT
+    on SQLite/PostgreSQL, ON DUPLICATE KEY UPDATE on MySQL), so a
+    subscribe racing the import cannot cause a unique-key failure.
+    
+    Args:
+        emails: Iterable of raw email values
+        chunk_size: Emails per transaction
+    
+    Returns:
+        dict: Counts of new, reactivated, existing (already active),
+            duplicate (repeated in the input) and invalid emails
+    """
+    counts = {'new': 0, 'reactivated': 0, 'existing': 0, 'duplicate': 0, 'invalid': 0}
+    
+    max_length = Subscriber.email.type.length
+    
+    valid = {}
+    for raw in emails:
+        email = raw.strip().lower() if isinstance(raw, str) else ''
+        
+        if not validate_email(email) or len(email) > max_length:
+            counts['invalid'] += 1
+        elif email in valid:
+            counts['duplicate'] += 1
+        else:
+            valid[email] = None
+    
+    unique = list(valid)
+    for start in range(0, len(unique), chunk_size):
+        chunk = unique[start:start + chunk_size]
+        
+        active = dict(db.session.execute(
+            select(Subscriber.email, Subscriber.is_active).where(Subscriber.email.in_(chunk))
+        ).all())
+        
+        to_write = [email for email in chunk if not active.get(email, False)]
+        inactive = [email for email in to_write if email in active]
+        
+        counts['existing'] += len(chunk) - len(to_write)
+        counts['reactivated'] += len(inactive)
+        counts['new'] += len(to_write) - len(inactive)
+        
+        if to_write:
+            _upsert(to_write, inactive)
+        db.session.commit()
+    
+    return counts
+
+
+def _upsert(emails, inactive):
+    """Insert new emails and reactivate unsubscribed ones in one executemany."""
+    table = Subscriber.__table__
+    now = datetime.utcnow()
+    rows = [{'email': email, 'is_active': True, 'subscribed_at': now} for email in emails]
+    dialect = db.engine.dialect.name
+    
+    if dialect in ON_CONFLICT_INSERTS:
+        statement = ON_CONFLICT_INSERTS[dialect](table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.email],
+            set_={'is_active': True, 'unsubscribed_at': None},
+            where=table.c.is_active.is_(False)
+        )
+        db.session.execute(statement, rows)
+    elif dialect in ON_DUPLICATE_KEY_INSERTS:
+        statement = ON_DUPLICATE_KEY_INSERTS[dialect](table)
+        statement = statement.on_duplicate_key_update(is_active=True, unsubscribed_at=None)
+        db.session.execute(statement, rows)
+    else:
+        # No portable upsert; rely on the classification SELECT
+        inactive = set(inactive)
+        new_rows = [row for row in rows if row['email'] not in inactive]
+        if new_rows:
+            db.session.execute(table.insert(), new_rows)
+        if inactive:
+            db.session.execute(
+                update(table)
+                .where(table.c.email.in_(inactive))
+                .values(is_active=True, unsubscribed_at=None)
+            )
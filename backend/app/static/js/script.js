@@ -2,6 +2,13 @@
 /* Application Logic                                                          */
 /* -------------------------------------------------------------------------- */
 
+// Random Idempotency-Key for a form submission; retries of the same
+// submission reuse it so the server creates at most one record
+function newIdempotencyKey() {
+    if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+    return Date.now().toString(36) + Math.random().toString(36).slice(2);
+}
+
 // Function to handle splash screen removal
 function initApp() {
     const splashScreen = document.getElementById('splash-screen');
@@ -78,6 +85,10 @@ document.addEventListener('DOMContentLoaded', () => {
     const contactForm = document.getElementById('contact-form');
 
     if (contactForm) {
+        // Kept across failed attempts, replaced once the form is edited or sent
+        let quoteKey = null;
+        contactForm.addEventListener('input', () => { quoteKey = null; });
+
         contactForm.addEventListener('submit', (e) => {
             e.preventDefault();
 
@@ -98,13 +109,16 @@ document.addEventListener('DOMContentLoaded', () => {
                 message: contactForm.querySelector('textarea').value
             };
 
+            quoteKey = quoteKey || newIdempotencyKey();
+
             fetch('/api/quote', {
                 method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
+                headers: { 'Content-Type': 'application/json', 'Idempotency-Key': quoteKey },
                 body: JSON.stringify(formData)
             })
                 .then(res => {
                     if (res.ok) {
+                        quoteKey = null;
                         res.json().then(data => {
                             successMsg.classList.remove('hidden');
                             successMsg.innerHTML = `Quote Request Received!<br>Your Ticket ID is <span class="font-mono font-bold text-white bg-slate-800 px-2 py-1 rounded">${data.ticket_id}</span><br><span class="text-sm">Save this ID to check your status.</span>`;
@@ -278,39 +292,43 @@ document.addEventListener('DOMContentLoaded', () => {
 
 });
 document.addEventListener('DOMContentLoaded', () => {
-    const dashboardImg = document.getElementById('dashboard-slider');
-
-    // List of images for the slider
-    // NOTE: Add your additional image filenames here
-    const images = [
-        '/static/images/teacher-dashboard.png',
-        '/static/images/admin-dashboard.png',
-        '/static/images/student-dashboard.png',
-        '/static/images/mobile-install.png'
-    ];
+    // Slides are <img> elements (inside <picture>) rendered by the template;
+    // only the current one is shown
+    const slider = document.getElementById('dashboard-slider');
+    const slides = slider ? slider.querySelectorAll('img') : [];
 
     let currentIndex = 0;
 
     // Function to change image with fade effect
     function changeImage() {
-        if (!dashboardImg || images.length <= 1) return;
+        if (slides.length <= 1) return;
 
         // Fade out
-        dashboardImg.style.opacity = '0';
+        const current = slides[currentIndex];
+        current.style.opacity = '0';
 
         setTimeout(() => {
-            currentIndex = (currentIndex + 1) % images.length;
-            dashboardImg.src = images[currentIndex];
+            current.hidden = true;
+            currentIndex = (currentIndex + 1) % slides.length;
 
-            // Fade in
-            dashboardImg.onload = () => {
-                dashboardImg.style.opacity = '1';
-            };
+            const next = slides[currentIndex];
+            next.style.opacity = '0';
+            next.hidden = false;
+
+            // Fade in (a hidden slide starts loading once it is shown)
+            const fadeIn = () => requestAnimationFrame(() => {
+                next.style.opacity = '1';
+            });
+            if (next.complete) {
+                fadeIn();
+            } else {
+                next.onload = fadeIn;
+            }
         }, 400); // Matches the CSS transition duration
     }
 
     // Start the slider if we have images
-    if (images.length > 1) {
+    if (slides.length > 1) {
         setInterval(changeImage, 4000); // Change every 4 seconds
     }
 
@@ -4,20 +4,56 @@ Exports utility functions.
 """
 from app.utils.helpers import (
     generate_ticket_id,
+    temporary_ticket_id,
     validate_required_fields,
     validate_email,
+    parse_bool,
     json_response,
     error_response,
     success_response,
-    require_json
+    accepted_response,
+    etag_matches,
+    not_modified_response,
+    with_etag,
+    require_json,
+    read_replica
+)
+from app.utils.serialization import (
+    StdlibJSONProvider,
+    OrjsonProvider,
+    json_provider_class,
+    Projection,
+    requested_projection
+)
+from app.utils.pagination import (
+    KeysetPage,
+    keyset_paginate,
+    encode_cursor,
+    decode_cursor
 )
 
 __all__ = [
     'generate_ticket_id',
+    'temporary_ticket_id',
     'validate_required_fields',
     'validate_email',
+    'parse_bool',
     'json_response',
     'error_response',
     'success_response',
-    'require_json'
+    'accepted_response',
+    'etag_matches',
+    'not_modified_response',
+    'with_etag',
+    'require_json',
+    'read_replica',
+    'KeysetPage',
+    'keyset_paginate',
+    'encode_cursor',
+    'decode_cursor',
+    'StdlibJSONProvider',
+    'OrjsonProvider',
+    'json_provider_class',
+    'Projection',
+    'requested_projection'
 ]
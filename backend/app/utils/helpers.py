@@ -2,23 +2,99 @@
 Utility Helpers
 Common utility functions used across the application.
 """
-import random
+import hashlib
+import hmac
 import string
+import uuid
 from functools import wraps
-from flask import request, jsonify
+from flask import request, jsonify, current_app, g
 
+# Characters used in the random-looking part of ticket IDs
+TICKET_ID_ALPHABET = string.ascii_uppercase + string.digits
 
-def generate_ticket_id():
+# Ticket ID widths, used in order as each one's space fills up
+TICKET_ID_WIDTHS = (4, 6, 8)
+
+# Width of retry IDs; no sequence (and no old random ID) ever has this width
+TICKET_ID_RETRY_WIDTH = 5
+
+
+def generate_ticket_id(sequence, attempt=0):
     """
-    Generate a unique ticket ID in OPT-XXXX format.
+    Derive a ticket ID in OPT-XXXX format from a ticket's primary key.
+    
+    The sequence number is passed through a keyed permutation of the ID
+    space, so distinct sequences always give distinct IDs without a
+    lookup, while consecutive tickets still look unrelated. Once the
+    36^4 four-character IDs are used up, IDs switch to six characters
+    (then eight).
+    
+    Retries (attempt > 0) step around IDs issued by the old random
+    generator. They get five-character IDs hashed from the sequence and
+    attempt, a width no sequence maps to, so a retry can never take the
+    ID of a later ticket. Retry IDs may collide with each other, which
+    the unique constraint catches and the next attempt resolves.
+    
+    Args:
+        sequence: Ticket primary key (autoincrement id, never reused)
+        attempt: Retry counter after a unique constraint failure
     
     Returns:
         str: Ticket ID like 'OPT-A1B2'
     """
-    # Generate 4 random alphanumeric characters
-    chars = string.ascii_uppercase + string.digits
-    random_part = ''.join(random.choice(chars) for _ in range(4))
-    return f'OPT-{random_part}'
+    secret = current_app.config['TICKET_ID_KEY']
+    base = len(TICKET_ID_ALPHABET)
+    
+    if attempt:
+        message = f'retry:{sequence}:{attempt}'.encode('utf-8')
+        digest = hmac.new(secret.encode('utf-8'), message, hashlib.sha256).digest()
+        return _format_ticket_id(int.from_bytes(digest[:8], 'big'), TICKET_ID_RETRY_WIDTH)
+    
+    # The ':0' suffix keeps IDs identical to those already issued
+    key = f'{secret}:0'.encode('utf-8')
+    
+    offset = sequence
+    for width in TICKET_ID_WIDTHS:
+        space = base ** width
+        if offset < space:
+            break
+        offset -= space
+    else:
+        raise ValueError(f'Ticket sequence {sequence} exceeds the ID space')
+    
+    return _format_ticket_id(_permute(offset, base ** (width // 2), key), width)
+
+
+def temporary_ticket_id():
+    """
+    Generate a unique placeholder ticket ID.
+    
+    Used for the initial insert, before the primary key the real ID is
+    derived from is known. It never outlives the transaction.
+    
+    Returns:
+        str: Placeholder like 'TMP-3F2A...' (20 characters)
+    """
+    return f'TMP-{uuid.uuid4().hex[:16].upper()}'
+
+
+def _format_ticket_id(value, width):
+    """Write the low width base-36 digits of value as 'OPT-' plus width characters."""
+    chars = []
+    for _ in range(width):
+        value, digit = divmod(value, len(TICKET_ID_ALPHABET))
+        chars.append(TICKET_ID_ALPHABET[digit])
+    
+    return f"OPT-{''.join(reversed(chars))}"
+
+
+def _permute(value, half, key, rounds=4):
+    """Balanced Feistel permutation over the range [0, half * half)."""
+    left, right = divmod(value, half)
+    for round_number in range(rounds):
+        digest = hmac.new(key, f'{round_number}:{right}'.encode('utf-8'), hashlib.sha256).digest()
+        left, right = right, (left + int.from_bytes(digest[:8], 'big')) % half
+    return left * half + right
 
 
 def validate_required_fields(data, required_fields):
@@ -28,7 +104,7 @@ def validate_required_fields(data, required_fields):
     Args:
         data: Dictionary of submitted data
         required_fields: List of required field names
-        
+    
     Returns:
         tuple: (is_valid, missing_fields)
     """
@@ -46,7 +122,7 @@ def validate_email(email):
     
     Args:
         email: Email address to validate
-        
+    
     Returns:
         bool: True if valid, False otherwise
     """
@@ -67,6 +143,19 @@ def validate_email(email):
     return True
 
 
+def parse_bool(value):
+    """
+    Parse a boolean query string value.
+    
+    Args:
+        value: Raw query parameter value
+    
+    Returns:
+        bool: True for '1', 'true' or 'yes' (case-insensitive)
+    """
+    return value.strip().lower() in ('1', 'true', 'yes')
+
+
 def json_response(data, status=200):
     """
     Create a standardized JSON response.
@@ -74,7 +163,7 @@ def json_response(data, status=200):
     Args:
         data: Dictionary to serialize
         status: HTTP status code
-        
+    
     Returns:
         Flask response object
     """
@@ -90,7 +179,7 @@ def error_response(message, status=400):
     Args:
         message: Error message
         status: HTTP status code
-        
+    
     Returns:
         Flask response object
     """
@@ -107,7 +196,7 @@ def success_response(data=None, message='Success'):
     Args:
         data: Optional data to include
         message: Success message
-        
+    
     Returns:
         Flask response object
     """
@@ -121,6 +210,66 @@ def success_response(data=None, message='Success'):
     return json_response(response_data)
 
 
+def accepted_response(message):
+    """
+    Create a 202 response for a submission queued for later storage.
+    
+    Args:
+        message: Message for the client
+    
+    Returns:
+        Flask response object
+    """
+    return json_response({
+        'success': True,
+        'queued': True,
+        'message': message
+    }, 202)
+
+
+def etag_matches(etag):
+    """
+    Check whether the request's If-None-Match header covers an ETag.
+    
+    Args:
+        etag: Strong ETag value (unquoted)
+    
+    Returns:
+        bool: True if the client already holds this version
+    """
+    return request.if_none_match.contains(etag)
+
+
+def not_modified_response(etag):
+    """
+    Create an empty 304 response for a conditional GET.
+    
+    Args:
+        etag: Strong ETag value (unquoted)
+    
+    Returns:
+        Flask response object
+    """
+    response = current_app.response_class(status=304)
+    return with_etag(response, etag)
+
+
+def with_etag(response, etag):
+    """
+    Attach an ETag to a response and ask clients to revalidate it.
+    
+    Args:
+        response: Flask response object
+        etag: Strong ETag value (unquoted)
+    
+    Returns:
+        The same response object
+    """
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
 def require_json(f):
     """
     Decorator to require JSON content type for a route.
@@ -131,3 +280,14 @@ def require_json(f):
             return error_response('Content-Type must be application/json', 400)
         return f(*args, **kwargs)
     return decorated_function
+
+
+def read_replica(f):
+    """
+    Decorator letting a read-only route query the read replica, if configured.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        g.read_replica = True
+        return f(*args, **kwargs)
+    return decorated_function
@@ -0,0 +1,112 @@
+"""
+Import-Time Profiling
+Measures per-module import cost of the app using python -X importtime.
+"""
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Builds the app the way a WSGI server would, outside any CLI context
+PROFILE_SCRIPT = 'from app import create_app; create_app({config_name!r})'
+
+
+class ImportRecord:
+    """
+    One line of -X importtime output.
+    
+    Attributes:
+        module: Dotted module name
+        self_us: Time spent in the module itself, in microseconds
+        cumulative_us: Time including the modules it imported, in microseconds
+        depth: Nesting level in the import tree (0 for top-level imports)
+    """
+    
+    def __init__(self, module, self_us, cumulative_us, depth):
+        self.module = module
+        self.self_us = self_us
+        self.cumulative_us = cumulative_us
+        self.depth = depth
+    
+    @property
+    def package(self):
+        """Top-level package the module belongs to."""
+        return self.module.split('.', 1)[0]
+
+
+def parse_importtime(output):
+    """
+    Parse -X importtime lines from a process's stderr.
+    
+    Args:
+        output: stderr text
+    
+    Returns:
+        list: ImportRecord per imported module, in import order
+    """
+    records = []
+    
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            # Header line
+            continue
+        
+        name = fields[2].rstrip()
+        module = name.lstrip()
+        depth = (len(name) - len(module) - 1) // 2
+        records.append(ImportRecord(module, int(fields[0]), int(fields[1]), depth))
+    
+    return records
+
+
+def profile_imports(config_name='production', env=None):
+    """
+    Build the app in a fresh interpreter and record every import.
+    
+    Args:
+        config_name: Configuration passed to create_app
+        env: Environment for the child process (default: os.environ)
+    
+    Returns:
+        list: ImportRecord per imported module
+    
+    Raises:
+        RuntimeError: If the app fails to start
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROFILE_SCRIPT.format(config_name=config_name)],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    
+    if result.returncode != 0:
+        raise RuntimeError(f'create_app failed:\n{result.stderr[-2000:]}')
+    
+    return parse_importtime(result.stderr)
+
+
+def package_totals(records):
+    """
+    Sum import cost per top-level package.
+    
+    Args:
+        records: ImportRecords from profile_imports
+    
+    Returns:
+        list: (package, self_us, module_count) tuples, most expensive first
+    """
+    totals = {}
+    
+    for record in records:
+        self_us, count = totals.get(record.package, (0, 0))
+        totals[record.package] = (self_us + record.self_us, count + 1)
+    
+    rows = [(name, self_us, count) for name, (self_us, count) in totals.items()]
+    return sorted(rows, key=lambda row: row[1], reverse=True)
@@ -0,0 +1,122 @@
+"""
+Keyset Pagination
+Cursor-based (seek) pagination over (timestamp, id) ordered queries.
+"""
+import base64
+import binascii
+from datetime import datetime
+
+from app.extensions import db
+
+
+def encode_cursor(timestamp, row_id):
+    """
+    Encode a (timestamp, id) position as an opaque URL-safe cursor.
+
+    Args:
+        timestamp: Sort column value of the row
+        row_id: Primary key of the row
+
+    Returns:
+        str: Cursor token
+    """
+    raw = f'{timestamp.isoformat()}|{row_id}'.encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        token: Cursor token
+
+    Returns:
+        tuple: (timestamp, row_id)
+
+    Raises:
+        ValueError: If the token is malformed
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8')
+        timestamp, row_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (binascii.Error, UnicodeError, ValueError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+class KeysetPage:
+    """
+    One page of a keyset-paginated query, newest first.
+
+    Exposes the same items/has_prev/has_next attributes templates use on
+    Flask-SQLAlchemy's Pagination, with cursors in place of page numbers.
+
+    Attributes:
+        items: Rows on this page
+        has_prev: Whether newer rows exist
+        has_next: Whether older rows exist
+        prev_cursor: Cursor for the newer page (pass as 'before')
+        next_cursor: Cursor for the older page (pass as 'after')
+    """
+
+    def __init__(self, items, has_prev, has_next, sort_attr):
+        self.items = items
+        self.has_prev = has_prev
+        self.has_next = has_next
+        self.prev_cursor = self._cursor_for(items[0], sort_attr) if has_prev and items else None
+        self.next_cursor = self._cursor_for(items[-1], sort_attr) if has_next and items else None
+
+    @staticmethod
+    def _cursor_for(row, sort_attr):
+        return encode_cursor(getattr(row, sort_attr), row.id)
+
+
+def keyset_paginate(query, sort_column, id_column, after=None, before=None, per_page=20):
+    """
+    Fetch one page ordered by (sort_column, id_column) descending.
+
+    Instead of OFFSET, the page boundary is expressed as a range predicate
+    on the composite index, so deep pages cost the same as the first one
+    and no COUNT query is needed.
+
+    Args:
+        query: Base query (filters already applied)
+        sort_column: Timestamp column to order by (e.g. Ticket.created_at)
+        id_column: Primary key column used as a tie-breaker
+        after: Cursor of the last row seen; returns older rows
+        before: Cursor of the first row seen; returns newer rows
+        per_page: Page size
+
+    Returns:
+        KeysetPage
+
+    Raises:
+        ValueError: If a cursor is malformed
+    """
+    if before:
+        timestamp, row_id = decode_cursor(before)
+        query = query.filter(
+            sort_column >= timestamp,
+            db.or_(sort_column > timestamp, id_column > row_id)
+        ).order_by(sort_column.asc(), id_column.asc())
+    else:
+        if after:
+            timestamp, row_id = decode_cursor(after)
+            query = query.filter(
+                sort_column <= timestamp,
+                db.or_(sort_column < timestamp, id_column < row_id)
+            )
+        query = query.order_by(sort_column.desc(), id_column.desc())
+
+    # Fetch one extra row to learn whether another page exists
+    rows = query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    if before:
+        rows.reverse()
+        return KeysetPage(rows, has_more, True, sort_column.key)
+
+    return KeysetPage(rows, bool(after), has_more, sort_column.key)
@@ -0,0 +1,4 @@
+"""
+Benchmarks Package
+Standalone performance measurements for the backend.
+"""
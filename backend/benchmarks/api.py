@@ -0,0 +1,434 @@
+"""
+API Benchmark
+Measures throughput and p50/p99 latency of the main endpoints on seeded data.
+
+Usage (from backend/):
+    python -m benchmarks.api [--mode both] [--requests 500] [--json results.json]
+    python -m benchmarks.api --json new.json --compare old.json [--tolerance 15]
+
+A file-backed SQLite database is seeded with tickets, messages, leads and
+subscribers, then every endpoint is timed in-process through the Flask
+test client (per-request cost, no network) and against gunicorn over HTTP
+with --concurrency client threads. Both use the production configuration.
+With --compare the run fails (exit status 1) when an endpoint's p99 or
+throughput is more than --tolerance percent worse than in the given
+results file.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENDPOINTS = ('quote', 'ticket_messages', 'tickets', 'leads', 'admin_dashboard')
+
+# Seeded rows, scaled by --scale
+SEED_COUNTS = {
+    'tickets': 5000,
+    'messages_per_ticket': 20,
+    'leads': 20000,
+    'subscribers': 50000,
+}
+
+WORDS = (
+    'website redesign mobile app invoice payment deadline update design '
+    'school portal attendance report bug login page speed hosting domain '
+    'please thanks hello issue feature request quote budget timeline'
+).split()
+
+
+def seed(app, scale, rng):
+    """
+    Bulk-insert realistic volumes of rows.
+
+    Returns:
+        list: Ticket IDs (OPT-XXXX) of the seeded tickets
+    """
+    from app.extensions import db
+    from app.models import Ticket, Message, Lead, Subscriber
+    from app.services import find_stale_summaries
+    from app.utils import generate_ticket_id
+
+    tickets = int(SEED_COUNTS['tickets'] * scale)
+    leads = int(SEED_COUNTS['leads'] * scale)
+    subscribers = int(SEED_COUNTS['subscribers'] * scale)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+
+    def sentence(length):
+        return ' '.join(rng.choices(WORDS, k=length))
+
+    with app.app_context():
+        db.create_all()
+
+        ticket_ids = [generate_ticket_id(pk) for pk in range(1, tickets + 1)]
+        db.session.execute(Ticket.__table__.insert(), [
+            {
+                'id': pk,
+                'ticket_id': ticket_ids[pk - 1],
+                'name': f'Customer {pk}',
+                'email': f'customer{pk}@example.com',
+                'project_type': rng.choice(('Web Development', 'Mobile App', 'Pathshala')),
+                'message': sentence(30),
+                'status': rng.choice(Ticket.VALID_STATUSES),
+                'created_at': now - timedelta(minutes=tickets - pk),
+                'updated_at': now - timedelta(minutes=tickets - pk),
+            }
+            for pk in range(1, tickets + 1)
+        ])
+
+        batch = []
+        for pk in range(1, tickets + 1):
+            for index in range(SEED_COUNTS['messages_per_ticket']):
+                batch.append({
+                    'ticket_id': pk,
+                    'sender': Message.SENDER_USER if index % 2 == 0 else Message.SENDER_ADMIN,
+                    'message': sentence(rng.randint(5, 40)),
+                    'created_at': now - timedelta(minutes=tickets - pk, seconds=-index),
+                })
+            if len(batch) >= 10000:
+                db.session.execute(Message.__table__.insert(), batch)
+                batch = []
+        if batch:
+            db.session.execute(Message.__table__.insert(), batch)
+
+        db.session.execute(Lead.__table__.insert(), [
+            {
+                'name': f'Lead {pk}',
+                'phone': f'+977 98{pk:08d}',
+                'school': f'School {pk % 500}',
+                'created_at': now - timedelta(minutes=leads - pk),
+            }
+            for pk in range(1, leads + 1)
+        ])
+
+        db.session.execute(Subscriber.__table__.insert(), [
+            {
+                'email': f'reader{pk}@example.com',
+                'is_active': pk % 10 != 0,
+                'subscribed_at': now - timedelta(minutes=subscribers - pk),
+            }
+            for pk in range(1, subscribers + 1)
+        ])
+
+        db.session.commit()
+
+        # Fill in the conversation summaries the write paths would maintain
+        find_stale_summaries(fix=True)
+
+    return ticket_ids
+
+
+def make_request(endpoint, rng, ticket_ids):
+    """Return (method, path, JSON body) for one request to an endpoint."""
+    if endpoint == 'quote':
+        return 'POST', '/api/quote', {
+            'name': 'Benchmark User',
+            'email': f'bench{rng.randrange(10 ** 6)}@example.com',
+            'project_type': 'Web Development',
+            'message': 'I need a new website for my school.',
+        }
+    if endpoint == 'ticket_messages':
+        return 'GET', f'/api/ticket/{rng.choice(ticket_ids)}/messages', None
+    if endpoint == 'tickets':
+        return 'GET', '/api/tickets?limit=50&cursor=', None
+    if endpoint == 'leads':
+        return 'GET', '/api/leads?limit=100&cursor=', None
+    if endpoint == 'admin_dashboard':
+        return 'GET', '/admin/', None
+    raise ValueError(f'Unknown endpoint: {endpoint}')
+
+
+def admin_cookie(app):
+    """Session cookie of a logged-in admin, valid for any worker with the same SECRET_KEY."""
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['admin_logged_in'] = True
+        session['admin_username'] = 'benchmark'
+    return client.get_cookie('session').value
+
+
+def run_inprocess(app, endpoint, count, rng, ticket_ids, cookie):
+    """Time requests sequentially through the test client."""
+    client = app.test_client()
+    client.set_cookie('session', cookie)
+    latencies, errors = [], 0
+
+    started = time.perf_counter()
+    for _ in range(count):
+        method, path, body = make_request(endpoint, rng, ticket_ids)
+        start = time.perf_counter()
+        response = client.open(path, method=method, json=body)
+        latencies.append(time.perf_counter() - start)
+        errors += response.status_code >= 300
+    elapsed = time.perf_counter() - started
+
+    return summarize(latencies, errors, elapsed)
+
+
+def run_http(port, endpoint, count, concurrency, seed_value, ticket_ids, cookie):
+    """Time requests from concurrency threads over keep-alive HTTP connections."""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    remaining = [count]
+
+    def worker(worker_seed):
+        rng = random.Random(worker_seed)
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        local, local_errors = [], 0
+
+        while True:
+            with lock:
+                if remaining[0] == 0:
+                    break
+                remaining[0] -= 1
+
+            method, path, body = make_request(endpoint, rng, ticket_ids)
+            headers = {'Cookie': f'session={cookie}'}
+            payload = None
+            if body is not None:
+                payload = json.dumps(body)
+                headers['Content-Type'] = 'application/json'
+
+            start = time.perf_counter()
+            try:
+                connection.request(method, path, body=payload, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                local_errors += response.status >= 300
+            except (OSError, http.client.HTTPException):
+                local_errors += 1
+                connection.close()
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            local.append(time.perf_counter() - start)
+
+        connection.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    threads = [
+        threading.Thread(target=worker, args=(seed_value * 1000 + index,))
+        for index in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return summarize(latencies, errors[0], elapsed)
+
+
+def summarize(latencies, errors, elapsed):
+    """Reduce latencies (seconds) to throughput and percentile statistics."""
+    ordered = sorted(latencies)
+
+    def percentile(fraction):
+        # Nearest-rank percentile
+        return ordered[max(0, int(round(fraction * len(ordered))) - 1)]
+
+    return {
+        'requests': len(ordered),
+        'errors': errors,
+        'throughput_rps': round(len(ordered) / elapsed, 1),
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 2),
+        'p50_ms': round(percentile(0.50) * 1000, 2),
+        'p99_ms': round(percentile(0.99) * 1000, 2),
+        'max_ms': round(ordered[-1] * 1000, 2),
+    }
+
+
+def report(mode, endpoint, stats):
+    print(f"{mode:<10} {endpoint:<16} {stats['throughput_rps']:>8.1f} req/s  "
+          f"p50 {stats['p50_ms']:>7.2f} ms  p99 {stats['p99_ms']:>7.2f} ms  "
+          f"errors {stats['errors']}")
+
+
+
+def start_gunicorn(env, workers, threads):
+    """Start gunicorn on a free port; return (process, port)."""
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}',
+         '--workers', str(workers), '--threads', str(threads),
+         '--log-level', 'warning', 'wsgi:application'],
+        cwd=BACKEND_DIR, env=env
+    )
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'gunicorn exited with status {process.returncode}')
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/api/health')
+            connection.getresponse().read()
+            connection.close()
+            return process, port
+        except OSError:
+            time.sleep(0.1)
+
+    process.terminate()
+    raise RuntimeError('gunicorn did not start within 30 s')
+
+
+def compare(results, baseline, tolerance):
+    """Print per-endpoint changes against a baseline; return the regressions."""
+    regressions = []
+
+    for key in ('seed_counts', 'requests', 'concurrency', 'gunicorn'):
+        if results['meta'].get(key) != baseline.get('meta', {}).get(key):
+            print(f'Warning: {key} differs from the baseline run; results may not be comparable')
+
+    print(f"\n{'mode':<10} {'endpoint':<16} {'p50':>16} {'p99':>16} {'rps':>16}")
+
+    for mode, endpoints in results['results'].items():
+        for endpoint, current in endpoints.items():
+            previous = baseline.get('results', {}).get(mode, {}).get(endpoint)
+            if not previous:
+                continue
+
+            changes = {
+                key: (current[key] - previous[key]) / previous[key] * 100 if previous[key] else 0.0
+                for key in ('p50_ms', 'p99_ms', 'throughput_rps')
+            }
+            print(f"{mode:<10} {endpoint:<16} "
+                  f"{previous['p50_ms']:>6.2f}->{current['p50_ms']:<6.2f}ms "
+                  f"{previous['p99_ms']:>6.2f}->{current['p99_ms']:<6.2f}ms "
+                  f"{changes['throughput_rps']:>+15.1f}%")
+
+            if changes['p99_ms'] > tolerance or changes['throughput_rps'] < -tolerance:
+                regressions.append(f'{mode}/{endpoint}')
+
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--mode', choices=('inprocess', 'gunicorn', 'both'), default='both')
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS),
+                        help='Comma-separated subset of: ' + ', '.join(ENDPOINTS))
+    parser.add_argument('--requests', type=int, default=500, help='Timed requests per endpoint')
+    parser.add_argument('--warmup', type=int, default=20, help='Untimed requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=16, help='Client threads against gunicorn')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers')
+    parser.add_argument('--threads', type=int, default=16, help='gunicorn threads per worker')
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiplier for SEED_COUNTS')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed')
+    parser.add_argument('--json', help='Write results to this file')
+    parser.add_argument('--compare', help='Results file from an earlier run')
+    parser.add_argument('--tolerance', type=float, default=15.0,
+                        help='Allowed p99/throughput regression in percent')
+    args = parser.parse_args()
+
+    endpoints = [name for name in args.endpoints.split(',') if name]
+    unknown = set(endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f'unknown endpoints: {", ".join(sorted(unknown))}')
+
+    rng = random.Random(args.seed)
+    results = {
+        'meta': {
+            'revision': git_revision(),
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'gunicorn': {'workers': args.workers, 'threads': args.threads},
+            'seed_counts': {name: int(count * args.scale) if name != 'messages_per_ticket' else count
+                            for name, count in SEED_COUNTS.items()},
+        },
+        'results': {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            FLASK_ENV='production',
+            DATABASE_URL=f'sqlite:///{os.path.join(tmp, "bench.db")}',
+            NOTIFY_SOCKET_DIR=os.path.join(tmp, 'notify'),
+            INGEST_JOURNAL_DIR=os.path.join(tmp, 'ingest'),
+            AUTO_CREATE_TABLES='false',
+            # Every request comes from one address; keep the limiter's cost, not its 429s
+            RATE_LIMIT_QUOTE='1000000/1',
+        )
+        os.environ.update(env)
+        sys.path.insert(0, BACKEND_DIR)
+
+        from app import create_app
+
+        app = create_app('production')
+
+        started = time.perf_counter()
+        ticket_ids = seed(app, args.scale, rng)
+        print(f'Seeded {results["meta"]["seed_counts"]} in {time.perf_counter() - started:.1f} s')
+
+        cookie = admin_cookie(app)
+
+        if args.mode in ('inprocess', 'both'):
+            results['results']['inprocess'] = {}
+            for endpoint in endpoints:
+                run_inprocess(app, endpoint, args.warmup, rng, ticket_ids, cookie)
+                stats = run_inprocess(app, endpoint, args.requests, rng, ticket_ids, cookie)
+                results['results']['inprocess'][endpoint] = stats
+                report('inprocess', endpoint, stats)
+
+        if args.mode in ('gunicorn', 'both'):
+            try:
+                process, port = start_gunicorn(env, args.workers, args.threads)
+            except RuntimeError as e:
+                print(f'Skipping gunicorn: {e}')
+            else:
+                try:
+                    results['results']['gunicorn'] = {}
+                    for endpoint in endpoints:
+                        run_http(port, endpoint, args.warmup, args.concurrency, args.seed, ticket_ids, cookie)
+                        stats = run_http(port, endpoint, args.requests, args.concurrency,
+                                         args.seed, ticket_ids, cookie)
+                        results['results']['gunicorn'][endpoint] = stats
+                        report('gunicorn', endpoint, stats)
+                finally:
+                    process.terminate()
+                    process.wait(timeout=30)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f'FAIL: more than {args.tolerance:g}% slower than '
+                  f'{baseline["meta"].get("revision") or args.compare}: {", ".join(regressions)}')
+            sys.exit(1)
+        print(f'OK: within {args.tolerance:g}% of {baseline["meta"].get("revision") or args.compare}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Startup Benchmark
+Measures cold-start time of create_app in fresh interpreter processes.
+
+Usage (from backend/):
+    python -m benchmarks.startup [--runs 10] [--json results.json] [--check]
+
+With --check the run fails (exit status 1) when the median time to first
+request of the production boot path exceeds FIRST_REQUEST_BUDGET_MS.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Timed in a child process so every run pays the full import cost
+CHILD_SCRIPT = '''
+import time
+start = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app('production')
+created = time.perf_counter()
+app.test_client().get('/api/health')
+print(imported - start, created - imported, time.perf_counter() - created)
+'''
+
+# Import + create_app + first response for the 'no_db_io' scenario, which is
+# how production boots. It measured about 580 ms on a development machine
+# (down from about 800 ms before Alembic became CLI-only); the headroom is
+# for slower hosts, not for new eager imports.
+FIRST_REQUEST_BUDGET_MS = 900
+BUDGET_SCENARIO = 'no_db_io'
+
+SCENARIOS = {
+    'create_all': {'AUTO_CREATE_TABLES': 'true'},
+    'no_db_io': {'AUTO_CREATE_TABLES': 'false'},
+}
+
+
+def measure(env, runs):
+    """Run the child script repeatedly; return (import, factory, request) timings in seconds."""
+    imports, factories, requests = [], [], []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', CHILD_SCRIPT],
+            cwd=BACKEND_DIR, env=env, check=True,
+            capture_output=True, text=True
+        ).stdout
+        import_time, factory_time, request_time = output.strip().splitlines()[-1].split()
+        imports.append(float(import_time))
+        factories.append(float(factory_time))
+        requests.append(float(request_time))
+    return imports, factories, requests
+
+
+def summarize(timings):
+    """Reduce timings to milliseconds statistics."""
+    ordered = sorted(timings)
+    return {
+        'runs': len(ordered),
+        'min_ms': round(ordered[0] * 1000, 2),
+        'median_ms': round(statistics.median(ordered) * 1000, 2),
+        'max_ms': round(ordered[-1] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10, help='Processes per scenario')
+    parser.add_argument('--json', help='Write results to this file')
+    parser.add_argument('--check', action='store_true',
+                        help=f'Fail if time to first request exceeds {FIRST_REQUEST_BUDGET_MS} ms')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base_env = dict(
+            os.environ,
+            DATABASE_URL=f'sqlite:///{os.path.join(tmp, "bench.db")}',
+            NOTIFY_SOCKET_DIR=os.path.join(tmp, 'notify'),
+        )
+
+        # Create the schema once so both scenarios start from the same database
+        measure(dict(base_env, AUTO_CREATE_TABLES='true'), 1)
+
+        results = {}
+        for name, overrides in SCENARIOS.items():
+            imports, factories, requests = measure(dict(base_env, **overrides), args.runs)
+            results[name] = {
+                'import': summarize(imports),
+                'create_app': summarize(factories),
+                'first_request': summarize(requests),
+                'total': summarize([sum(t) for t in zip(imports, factories, requests)]),
+            }
+            for phase, stats in results[name].items():
+                print(f"{name:<12} {phase:<13} median {stats['median_ms']:>8.2f} ms  "
+                      f"min {stats['min_ms']:>8.2f} ms  max {stats['max_ms']:>8.2f} ms")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.check:
+        median_ms = results[BUDGET_SCENARIO]['total']['median_ms']
+        if median_ms > FIRST_REQUEST_BUDGET_MS:
+            print(f'FAIL: time to first request {median_ms:.2f} ms exceeds the '
+                  f'{FIRST_REQUEST_BUDGET_MS} ms budget; see `flask profile-imports`')
+            sys.exit(1)
+        print(f'OK: time to first request {median_ms:.2f} ms '
+              f'(budget {FIRST_REQUEST_BUDGET_MS} ms)')
+
+
+if __name__ == '__main__':
+    main()
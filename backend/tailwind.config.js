@@ -0,0 +1,13 @@
+/**
+ * Tailwind config for `flask build-css`.
+ * The theme is shared with the CDN fallback in templates/_styles.html.
+ */
+module.exports = {
+  content: [
+    './app/templates/**/*.html',
+    './app/static/js/**/*.js',
+  ],
+  theme: {
+    extend: require('./tailwind.theme.json'),
+  },
+};
@@ -0,0 +1,80 @@
+"""
+Build Download Tests
+Pinned sha256 checks for the Tailwind CLI and font sources.
+"""
+import hashlib
+import importlib
+import json
+import os
+
+import pytest
+
+stylesheets = importlib.import_module('app.services.stylesheets')
+
+SOURCE = 'https://example.com/tool'
+
+
+@pytest.fixture
+def artifact(tmp_path):
+    path = tmp_path / 'tool'
+    path.write_bytes(b'tool binary')
+    return path
+
+
+def write_lock(tmp_path, monkeypatch, pins):
+    lock = tmp_path / 'downloads.lock.json'
+    lock.write_text(json.dumps(pins))
+    monkeypatch.setattr(stylesheets, 'DOWNLOADS_LOCK', str(lock))
+
+
+def test_pinned_download_is_returned(tmp_path, monkeypatch, artifact):
+    digest = hashlib.sha256(b'tool binary').hexdigest()
+    write_lock(tmp_path, monkeypatch, {SOURCE: {'url': artifact.as_uri(), 'sha256': digest}})
+
+    assert stylesheets.download_pinned(SOURCE) == b'tool binary'
+
+
+def test_checksum_mismatch_is_refused(tmp_path, monkeypatch, artifact):
+    write_lock(tmp_path, monkeypatch, {SOURCE: {'url': artifact.as_uri(), 'sha256': '0' * 64}})
+
+    with pytest.raises(RuntimeError, match='Checksum mismatch'):
+        stylesheets.download_pinned(SOURCE)
+
+
+def test_unpinned_download_is_refused(tmp_path, monkeypatch):
+    write_lock(tmp_path, monkeypatch, {})
+
+    with pytest.raises(RuntimeError, match='not pinned'):
+        stylesheets.download_pinned(SOURCE)
+
+
+def test_fetch_tailwind_installs_an_executable(tmp_path, monkeypatch, artifact):
+    digest = hashlib.sha256(b'tool binary').hexdigest()
+    write_lock(tmp_path, monkeypatch, {
+        stylesheets.TAILWIND_DOWNLOAD: {'url': artifact.as_uri(), 'sha256': digest}
+    })
+    target = tmp_path / 'tailwindcss'
+
+    stylesheets.fetch_tailwind(str(target))
+
+    assert target.read_bytes() == b'tool binary'
+    assert os.access(target, os.X_OK)
+
+
+def test_branch_urls_are_pinned_to_a_commit(monkeypatch):
+    commit = 'a' * 40
+    requested = []
+
+    def fake_download(url):
+        requested.append(url)
+        return json.dumps({'sha': commit}).encode()
+
+    monkeypatch.setattr(stylesheets, '_download', fake_download)
+
+    branch = 'https://raw.githubusercontent.com/google/fonts/main/ofl/nunito/Nunito%5Bwght%5D.ttf'
+    pinned = f'https://raw.githubusercontent.com/google/fonts/{commit}/ofl/nunito/Nunito%5Bwght%5D.ttf'
+
+    assert stylesheets._commit_url(branch) == pinned
+    assert stylesheets._commit_url(pinned) == pinned
+    assert stylesheets._commit_url(stylesheets.TAILWIND_DOWNLOAD) == stylesheets.TAILWIND_DOWNLOAD
+    assert requested == ['https://api.github.com/repos/google/fonts/commits/main']
@@ -0,0 +1,44 @@
+"""
+Idempotency Key Tests
+Which responses are stored and replayed for a retried key.
+"""
+import pytest
+from flask import Flask, jsonify
+
+from app.services.idempotency import IdempotencyKeys
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.config.update(IDEMPOTENCY_BACKEND='memory')
+    idempotency = IdempotencyKeys(app)
+    app.calls = []
+
+    @app.route('/<int:status>', methods=['POST'])
+    @idempotency.idempotent
+    def respond(status):
+        app.calls.append(status)
+        return jsonify(call=len(app.calls)), status
+
+    return app.test_client()
+
+
+@pytest.mark.parametrize('status', [200, 201, 202])
+def test_accepted_responses_are_replayed(client, status):
+    first = client.post(f'/{status}', headers={'Idempotency-Key': 'k'})
+    retry = client.post(f'/{status}', headers={'Idempotency-Key': 'k'})
+
+    assert client.application.calls == [status]
+    assert retry.status_code == status
+    assert retry.get_json() == first.get_json()
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+
+
+@pytest.mark.parametrize('status', [400, 429, 503])
+def test_error_responses_release_the_key(client, status):
+    client.post(f'/{status}', headers={'Idempotency-Key': 'k'})
+    retry = client.post(f'/{status}', headers={'Idempotency-Key': 'k'})
+
+    assert client.application.calls == [status, status]
+    assert 'Idempotent-Replayed' not in retry.headers
@@ -0,0 +1,187 @@
+"""
+Ingest Queue Tests
+Batched writes, journal replay and the writer's failure handling.
+"""
+import errno
+import importlib
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+from datetime import datetime
+
+import pytest
+from flask import Flask
+from sqlalchemy.exc import OperationalError
+
+from app.extensions import db
+from app.models import Lead
+from app.services.ingest import IngestError, IngestQueue, ingest_receipts
+
+ingest_module = importlib.import_module('app.services.ingest')
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'test.db'}",
+        INGEST_MODE='batched',
+        INGEST_JOURNAL_DIR=str(tmp_path / 'journal'),
+        INGEST_BATCH_WAIT_MS=1,
+        INGEST_COMMIT_TIMEOUT=5
+    )
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+
+    return app
+
+
+@pytest.fixture
+def ingest(app):
+    queue = IngestQueue(app)
+
+    @queue.handler('lead')
+    def stage_lead(payload, attempt):
+        lead = Lead(**payload)
+        db.session.add(lead)
+        return lambda: {'lead_id': lead.id}
+
+    return queue
+
+
+def dead_pid():
+    """A pid that belonged to a process which has exited."""
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def journal_line(name, token):
+    return json.dumps({'kind': 'lead', 'payload': {'name': name, 'phone': '5550100'}, 'token': token})
+
+
+def write_journal(app, pid, lines):
+    directory = app.config['INGEST_JOURNAL_DIR']
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, f'{pid}.jsonl'), 'w', encoding='utf-8') as f:
+        f.writelines(line + '\n' for line in lines)
+
+
+def journal_files(app):
+    return sorted(os.listdir(app.config['INGEST_JOURNAL_DIR']))
+
+
+def lead_names(app):
+    with app.app_context():
+        return sorted(lead.name for lead in Lead.query)
+
+
+def submit_lead(ingest, name, **kwargs):
+    return ingest.submit('lead', {'name': name, 'phone': '5550100'}, **kwargs)
+
+
+def test_submit_returns_handler_result(app, ingest):
+    assert submit_lead(ingest, 'Ada') == {'lead_id': 1}
+    assert lead_names(app) == ['Ada']
+    assert journal_files(app) == [f'{os.getpid()}.jsonl']
+
+
+def test_replays_journal_of_dead_worker(app, ingest):
+    pid = dead_pid()
+    write_journal(app, pid, [journal_line('Ada', 'a' * 32), journal_line('Bob', 'b' * 32)])
+
+    submit_lead(ingest, 'Cy')
+
+    assert lead_names(app) == ['Ada', 'Bob', 'Cy']
+    assert journal_files(app) == [f'{os.getpid()}.jsonl']
+
+
+def test_replay_skips_submissions_with_receipts(app, ingest):
+    # Ada committed before the crash, ahead of her journal being cleared
+    with app.app_context():
+        db.session.add(Lead(name='Ada', phone='5550100'))
+        db.session.execute(ingest_receipts.insert(), [{'token': 'a' * 32, 'created_at': datetime.utcnow()}])
+        db.session.commit()
+
+    write_journal(app, dead_pid(), [journal_line('Ada', 'a' * 32), journal_line('Bob', 'b' * 32)])
+
+    submit_lead(ingest, 'Cy')
+
+    assert lead_names(app) == ['Ada', 'Bob', 'Cy']
+
+
+def test_torn_journal_line_is_quarantined(app, ingest):
+    pid = dead_pid()
+    torn = journal_line('Bob', 'b' * 32)[:20]
+    write_journal(app, pid, [journal_line('Ada', 'a' * 32), torn])
+
+    submit_lead(ingest, 'Cy')
+
+    assert lead_names(app) == ['Ada', 'Cy']
+    assert journal_files(app) == [f'{os.getpid()}.jsonl', f'{pid}.jsonl.quarantine']
+    with open(os.path.join(app.config['INGEST_JOURNAL_DIR'], f'{pid}.jsonl.quarantine'), encoding='utf-8') as f:
+        assert f.read() == torn + '\n'
+
+
+def test_failed_recovery_is_retried(app, ingest, monkeypatch):
+    write_journal(app, dead_pid(), [journal_line('Ada', 'a' * 32)])
+
+    stored_tokens = ingest_module._stored_tokens
+    calls = []
+
+    def locked_once(tokens):
+        calls.append(tokens)
+        if len(calls) == 1:
+            raise OperationalError('SELECT', {}, sqlite3.OperationalError('database is locked'))
+        return stored_tokens(tokens)
+
+    monkeypatch.setattr(ingest_module, '_stored_tokens', locked_once)
+    ingest.RECOVER_RETRY = 0
+
+    # The writer keeps serving while the journal waits for another attempt
+    submit_lead(ingest, 'Cy')
+    submit_lead(ingest, 'Dee')
+
+    assert len(calls) == 2
+    assert lead_names(app) == ['Ada', 'Cy', 'Dee']
+    assert journal_files(app) == [f'{os.getpid()}.jsonl']
+
+
+def test_journal_failure_fails_the_batch_not_the_writer(app, ingest):
+    journal_append = ingest._journal_append
+    calls = []
+
+    def disk_full_once(batch):
+        calls.append(batch)
+        if len(calls) == 1:
+            raise OSError(errno.ENOSPC, 'No space left on device')
+        journal_append(batch)
+
+    ingest._journal_append = disk_full_once
+
+    with pytest.raises(IngestError):
+        submit_lead(ingest, 'Ada', deferrable=False)
+
+    submit_lead(ingest, 'Bob')
+
+    assert lead_names(app) == ['Bob']
+
+
+@pytest.mark.filterwarnings('ignore::pytest.PytestUnhandledThreadExceptionWarning')
+def test_dead_writer_is_restarted(app, ingest):
+    def crash():
+        raise SystemExit()
+
+    ingest._next_batch = crash
+    first = ingest._ensure_writer()
+    first.join(5)
+    assert not first.is_alive()
+
+    del ingest._next_batch
+
+    assert submit_lead(ingest, 'Ada') == {'lead_id': 1}
+    assert ingest._writer is not first